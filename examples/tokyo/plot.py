@@ -1,3 +1,4 @@
+import copy
 import multiprocessing as mp
 from pathlib import Path
 import time
@@ -18,8 +19,7 @@ from seir_markov_lockdown.app import (
     init_draw_axis,
     draw_interpolation,
     draw_people,
-    load_world_from_snapshot,
-    load_world_from_snapshot,
+    SnapshotReader,
 )
 
 
@@ -27,7 +27,7 @@ def plot_anim_frame_with_interpolation(
     i: int,
     fig: mpl.figure.Figure,
     axis: mpl.axes.Axes,
-    dir_cond: Path,
+    reader: SnapshotReader,
     files_snapshot: list[Path],
     background: Image,
     cities: list[City],
@@ -88,16 +88,13 @@ def plot_anim_frame_with_interpolation(
 
         prev_people.clear()
         prev_people.extend(next_people)
-        world, _ = load_world_from_snapshot(
-            files_snapshot[i // interpolation_frames],
-            dir_cond / "cities.csv",
-            dir_cond / "connections.csv",
-            dir_cond / "city_groups.csv",
-            dir_cond / "people.csv",
-        )
+        # NOTE
+        #   The reader updates the same people in place, so they are copied
+        #   to be kept for the interpolation.
+        world = reader.load(files_snapshot[i // interpolation_frames])
 
         next_people.clear()
-        next_people.extend(world.people)
+        next_people.extend(copy.copy(person) for person in world.people)
 
         cities.clear()
         cities.extend(world.cities)
@@ -128,15 +125,16 @@ def plot_anim(
     dir_cond: Path,
 ) -> None:
     dir_snapshots = dir_cond / "snapshots"
-    files_snapshot = list(dir_snapshots.iterdir())
+    files_snapshot = sorted(dir_snapshots.glob("*.csv"))
 
-    world, cities_pos = load_world_from_snapshot(
-        files_snapshot[0],
+    reader = SnapshotReader(
         dir_cond / "cities.csv",
         dir_cond / "connections.csv",
         dir_cond / "city_groups.csv",
         dir_cond / "people.csv",
     )
+    world = reader.load(files_snapshot[0])
+    cities_pos = reader.cities_pos
     im = Image.open("tokyo.png")
     interpolation_frames = 3
     fig, axis = plt.subplots()
@@ -149,12 +147,12 @@ def plot_anim(
         fargs=(
             fig,
             axis,
-            dir_cond,
+            reader,
             files_snapshot,
             im,
             list(world.cities),
             cities_pos,
-            list(world.people),
+            [copy.copy(person) for person in world.people],
             [],
             interpolation_frames,
             (70, 150),
@@ -1,11 +1,29 @@
+from .array_world import ArrayWorld
+from .branch import (
+    branch_world,
+    run_burn_in,
+    set_cohort_params,
+    set_lockdown_regulation,
+)
 from .city import (
     City,
+    CityGraph,
     CityGroup,
+    CityRegistry,
+)
+from .compartment import (
+    CompartmentWorld,
+    PersonClass,
 )
+from .ensemble import EnsembleWorld
+from .hybrid import HybridWorld
 from .person import (
     CountsPeople_t,
     Person,
+    PersonCohort,
     PersonState,
     PopulationDependentPerson,
 )
+from .rng import RandomStreams
+from .shard import ShardedWorld
 from .world import World
@@ -3,7 +3,9 @@ import click
 from .app import (
     load_plot_config,
     load_snapshot_config,
+    load_sweep_config,
     plot_anim,
+    run_sweep,
     run_with_snapshots,
 )
 
@@ -33,4 +35,18 @@ def snapshot(file_config: str) -> None:
     run_with_snapshots(config)
 
 
-main()
+@main.command()
+@click.argument("file_config", type=click.Path(exists=True))
+def sweep(file_config: str) -> None:
+    """Run simulations of 'SEIR Markov lockdown' model over a grid of
+    parameters and take snapshots of each with the config in FILE_CONFIG.
+    """
+    config = load_sweep_config(file_config)
+    failed = run_sweep(config)
+    if failed:
+        names = ", ".join(point.name for point in failed)
+        raise click.ClickException(f"Failed sweep points: {names}")
+
+
+if __name__ == "__main__":
+    main()
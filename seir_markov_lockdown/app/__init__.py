@@ -1,12 +1,25 @@
+from .columnar import (
+    COLUMNS_COLUMNAR,
+    MAGIC_COLUMNAR,
+    VERSION_COLUMNAR,
+    ColumnarSnapshot,
+    read_columnar_snapshot,
+    write_columnar_snapshot,
+)
 from .config import (
     PlotConfig,
     SnapshotConfig,
+    SweepConfig,
     load_plot_config,
     load_snapshot_config,
+    load_sweep_config,
 )
 from .load import (
+    load_array_world,
     load_cities,
     load_city_groups,
+    load_compartment_world,
+    load_ensemble_world,
     load_people,
     load_world,
 )
@@ -22,10 +35,37 @@ from .plot import (
     plot_anim_frame_with_interpolation,
 )
 from .snapshot import (
+    FIELDS_SNAPSHOTS,
+    FILE_ABSORBED,
+    FILE_TRAJECTORY,
+    FILE_UNORDERED,
+    SUFFIXES_COMPRESSION,
+    SUFFIXES_SNAPSHOT,
+    SnapshotReader,
     load_world_from_snapshot,
     run_with_snapshots,
+    run_world_with_snapshots,
+    snapshot_array_world,
+    snapshot_compartment_world,
+    snapshot_ensemble_world,
     snapshot_world,
 )
+from .sweep import (
+    FIELDS_SWEEP,
+    FILE_BURN_IN,
+    FILE_SWEEP,
+    PARAMS_SWEEP,
+    SweepPoint,
+    apply_sweep_point,
+    make_sweep_points,
+    run_sweep,
+)
+from .trajectory import (
+    MAGIC_TRAJECTORY,
+    VERSION_TRAJECTORY,
+    TrajectoryReader,
+    TrajectoryWriter,
+)
 from .utils import (
     check_city_def,
     check_float,
@@ -34,3 +74,4 @@ from .utils import (
     check_prob,
     check_state,
 )
+from .writer import BackgroundWriter
@@ -0,0 +1,146 @@
+import json
+from pathlib import Path
+import struct
+import typing as t
+
+import numpy as np
+
+from ..array_world import STATES
+
+
+MAGIC_COLUMNAR = b"SEIRSNAP"
+VERSION_COLUMNAR = 1
+COLUMNS_COLUMNAR = (
+    ("state", "|i1"),
+    ("city", "<i4"),
+    ("remaining_steps_for_onset", "<i4"),
+    ("remaining_steps_for_recover", "<i4"),
+)
+
+# NOTE
+#   Columns start at multiples of this many bytes of the file.
+_ALIGNMENT = 64
+
+
+class ColumnarSnapshot(t.NamedTuple):
+
+    cities: tuple[str, ...]
+    states: np.ndarray
+    positions: np.ndarray
+    remaining_steps_for_onset: np.ndarray
+    remaining_steps_for_recover: np.ndarray
+    ordered: bool = True
+
+
+def write_columnar_snapshot(
+    file: Path | str,
+    cities: t.Sequence[str],
+    states: np.ndarray,
+    positions: np.ndarray,
+    remaining_steps_for_onset: np.ndarray,
+    remaining_steps_for_recover: np.ndarray,
+    ordered: bool = True,
+) -> None:
+    # NOTE
+    #   The file is the magic, the length of the header, the header in JSON
+    #   and the columns as fixed-width arrays. The header maps the city ids
+    #   in the columns to names, and gives the dtype and offset of each
+    #   column, so that columns can be memory-mapped. Unless `ordered`, the
+    #   rows are not in the order of the people of the inputs.
+    num_people = len(states)
+    arrays = (
+        states,
+        positions,
+        remaining_steps_for_onset,
+        remaining_steps_for_recover,
+    )
+
+    def header_for(begin: int) -> bytes:
+        columns = []
+        offset = begin
+        for name, dtype in COLUMNS_COLUMNAR:
+            columns.append((name, dtype, offset))
+            offset = _align(offset + num_people * np.dtype(dtype).itemsize)
+        header = {
+            "version": VERSION_COLUMNAR,
+            "num_people": num_people,
+            "states": [state.name for state in STATES],
+            "cities": list(cities),
+            "columns": columns,
+            "ordered": ordered,
+        }
+        return json.dumps(header).encode("utf-8")
+
+    # NOTE
+    #   The offsets depend on the length of the header in which they are
+    #   written, so the header is built until its length settles.
+    prefix = len(MAGIC_COLUMNAR) + 8
+    header = header_for(0)
+    while True:
+        begin = _align(prefix + len(header))
+        next_header = header_for(begin)
+        if len(next_header) == len(header):
+            header = next_header
+            break
+        header = next_header
+
+    with open(file, "wb") as f:
+        f.write(MAGIC_COLUMNAR)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for (_, dtype), array in zip(COLUMNS_COLUMNAR, arrays):
+            f.write(b"\0" * (_align(f.tell()) - f.tell()))
+            f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+
+
+def read_columnar_snapshot(
+    file: Path | str,
+    mmap: bool = True,
+) -> ColumnarSnapshot:
+    # NOTE
+    #   With `mmap`, the columns are read-only views of the file.
+    with open(file, "rb") as f:
+        if f.read(len(MAGIC_COLUMNAR)) != MAGIC_COLUMNAR:
+            raise ValueError(f"'{str(file)}' is not a columnar snapshot.")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+
+    if header["version"] != VERSION_COLUMNAR:
+        raise ValueError(
+            f"'{str(file)}': version {header['version']} of columnar "
+            "snapshots is not supported."
+        )
+    if header["states"] != [state.name for state in STATES]:
+        raise ValueError(f"'{str(file)}': states are not consistent.")
+
+    num_people = header["num_people"]
+    columns: list[np.ndarray] = []
+    for _, dtype, offset in header["columns"]:
+        if num_people == 0:
+            column = np.zeros(0, dtype=dtype)
+        elif mmap:
+            column = np.memmap(
+                file,
+                dtype=dtype,
+                mode="r",
+                offset=offset,
+                shape=(num_people,),
+            )
+        else:
+            column = np.fromfile(
+                file,
+                dtype=dtype,
+                count=num_people,
+                offset=offset,
+            )
+        columns.append(column)
+
+    return ColumnarSnapshot(
+        tuple(header["cities"]),
+        *columns,
+        header.get("ordered", True),
+    )
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
@@ -1,4 +1,5 @@
 from pathlib import Path
+import typing as t
 
 import pydantic
 import yaml
@@ -13,6 +14,9 @@ class PlotConfig(pydantic.BaseModel):
     file_people: str
     steps: int
 
+    # simulation settings
+    seed: t.Optional[int] = None
+
     # output settings
     file_output: str
     dpi: int = 100
@@ -49,8 +53,32 @@ class SnapshotConfig(pydantic.BaseModel):
     file_people: str
     steps: int
 
+    # simulation settings
+    engine: t.Literal[
+        "object",
+        "array",
+        "sharded",
+        "ensemble",
+        "compartment",
+    ] = "object"
+    on_absorbing: t.Literal["continue", "stop", "movement"] = "continue"
+    seed: t.Optional[int] = None
+    num_shards: t.Optional[int] = None     # if None, the number of CPUs.
+    num_replicates: int = 1                 # only for "ensemble".
+
     # output settings
     dir_snapshots: str
+    snapshot_format: t.Literal["csv", "columnar", "trajectory"] = "csv"
+    keyframe_interval: int = 100            # only for "trajectory".
+    snapshot_compression: t.Optional[t.Literal["gzip"]] = None  # for "csv".
+    snapshot_fsync: bool = False
+    snapshot_queue_size: int = 2            # if 0, written synchronously.
+
+    # snapshot settings, all the steps if none of them is set
+    snapshot_interval: t.Optional[int] = None
+    snapshot_steps: t.Optional[list[int | str]] = None  # e.g. [0, "10-20"]
+    snapshot_on_lockdown_change: bool = False
+    snapshot_on_infected_change: t.Optional[float] = None   # e.g. 0.1 for 10%
 
 
 def load_snapshot_config(file_config: Path | str) -> SnapshotConfig:
@@ -58,3 +86,29 @@ def load_snapshot_config(file_config: Path | str) -> SnapshotConfig:
         config = yaml.safe_load(f)
 
     return SnapshotConfig(**config)
+
+
+Prob_t = t.Annotated[float, pydantic.Field(ge=0., le=1.)]
+
+
+class SweepConfig(SnapshotConfig):
+
+    # sweep settings
+    p_infection: t.Optional[list[Prob_t]] = None
+    action_regulation: t.Optional[list[Prob_t]] = None
+    lockdown_regulation: t.Optional[list[Prob_t]] = None
+
+    # burn-in settings
+    burn_in_steps: int = 0                  # if 0, no burn-in.
+    burn_in_until_threshold: bool = False
+
+    # execution settings
+    num_processes: t.Optional[int] = None   # if None, the number of CPUs.
+    max_retries: int = 1
+
+
+def load_sweep_config(file_config: Path | str) -> SweepConfig:
+    with open(file_config, "rt") as f:
+        config = yaml.safe_load(f)
+
+    return SweepConfig(**config)
@@ -1,5 +1,6 @@
 import csv
 from pathlib import Path
+import typing as t
 
 from .utils import (
     check_city_def,
@@ -9,9 +10,15 @@ from .utils import (
     check_state,
 )
 from .. import (
+    ArrayWorld,
     City,
+    CityGraph,
     CityGroup,
+    CityRegistry,
+    CompartmentWorld,
+    EnsembleWorld,
     Person,
+    PersonCohort,
     World,
 )
 
@@ -34,8 +41,8 @@ def load_cities(
     file_cities: Path | str,
     file_connections: Path | str,
     skip_rows: int = 1,
-) -> tuple[dict[str, City], dict[str, tuple[float, float]]]:
-    cities: dict[str, City] = {}
+) -> tuple[CityRegistry, dict[str, tuple[float, float]]]:
+    cities = CityRegistry()
     connections: dict[City, set[City]] = {}
     cities_pos: dict[str, tuple[float, float]] = {}
 
@@ -51,14 +58,13 @@ def load_cities(
             x = check_float(row["x"], file_cities, line)
             y = check_float(row["y"], file_cities, line)
 
-            city = City(row["name"])
             if row["name"] in cities:
                 raise ValueError(
                     f"'{str(file_cities)}' line {line}: duplicated city "
                     f"name '{row['name']}' is found."
                 )
 
-            cities[row["name"]] = city
+            city = cities.register(row["name"])
             connections[city] = set()
             cities_pos[row["name"]] = (x, y)
 
@@ -86,15 +92,19 @@ def load_cities(
 
     for city, visitables in connections.items():
         city.setup_initial_visitables(*visitables)
+    # NOTE
+    #   The graph numbers cities in the order of the registry, so the index
+    #   of a city in the graph is its id.
+    CityGraph(cities.cities)
 
     return cities, cities_pos
 
 
 def load_city_groups(
     file: Path | str,
-    cities: dict[str, City],
+    cities: t.Mapping[str, City],
     skip_rows: int = 1,
-) -> set[CityGroup]:
+) -> list[CityGroup]:
     city_groups: dict[str, CityGroup] = {}
     with open(file, "rt") as f:
         reader = csv.DictReader(f, FIELDS_CITY_GROUPS)
@@ -128,15 +138,18 @@ def load_city_groups(
                 )
                 city_groups[row["name"]] = city_group
 
-    return set(city_groups.values())
+    return list(city_groups.values())
 
 
 def load_people(
     file: Path | str,
-    cities: dict[str, City],
+    cities: t.Mapping[str, City],
     skip_rows: int = 1,
 ) -> list[Person]:
+    # NOTE
+    #   People with the same parameters share one cohort.
     people: list[Person] = []
+    cohorts: dict[PersonCohort, PersonCohort] = {}
 
     with open(file, "rt") as f:
         reader = csv.DictReader(f, FIELDS_PEOPLE)
@@ -168,16 +181,15 @@ def load_people(
                 positive=True,
             )
 
-            person = Person(
-                city,
-                init_state,
+            cohort = PersonCohort(
                 p_infection,
                 p_staying,
                 action_regulation,
                 steps_for_onset,
                 steps_for_recover,
             )
-            people.append(person)
+            cohort = cohorts.setdefault(cohort, cohort)
+            people.append(Person.of_cohort(city, init_state, cohort))
 
     return people
 
@@ -188,6 +200,7 @@ def load_world(
     file_city_groups: Path | str,
     file_people: Path | str,
     skip_rows: int = 1,
+    seed: t.Optional[int] = None,
 ) -> tuple[World, dict[str, tuple[float, float]]]:
     cities, cities_pos = load_cities(
         file_cities,
@@ -200,4 +213,81 @@ def load_world(
         skip_rows=skip_rows,
     )
     people = load_people(file_people, cities, skip_rows=skip_rows)
-    return World(people, set(cities.values()), city_groups), cities_pos
+    world = World(people, list(cities.values()), city_groups, seed=seed)
+    return world, cities_pos
+
+
+def load_array_world(
+    file_cities: Path | str,
+    file_connections: Path | str,
+    file_city_groups: Path | str,
+    file_people: Path | str,
+    skip_rows: int = 1,
+    seed: t.Optional[int] = None,
+) -> tuple[ArrayWorld, dict[str, tuple[float, float]]]:
+    cities, cities_pos = load_cities(
+        file_cities,
+        file_connections,
+        skip_rows=skip_rows,
+    )
+    city_groups = load_city_groups(
+        file_city_groups,
+        cities,
+        skip_rows=skip_rows,
+    )
+    people = load_people(file_people, cities, skip_rows=skip_rows)
+    world = ArrayWorld(
+        people,
+        list(cities.values()),
+        city_groups,
+        seed=seed,
+    )
+    return world, cities_pos
+
+
+def load_ensemble_world(
+    file_cities: Path | str,
+    file_connections: Path | str,
+    file_city_groups: Path | str,
+    file_people: Path | str,
+    num_replicates: int,
+    skip_rows: int = 1,
+    seed: t.Optional[int] = None,
+) -> tuple[EnsembleWorld, dict[str, tuple[float, float]]]:
+    world, cities_pos = load_array_world(
+        file_cities,
+        file_connections,
+        file_city_groups,
+        file_people,
+        skip_rows=skip_rows,
+        seed=seed,
+    )
+    return EnsembleWorld(world, num_replicates), cities_pos
+
+
+def load_compartment_world(
+    file_cities: Path | str,
+    file_connections: Path | str,
+    file_city_groups: Path | str,
+    file_people: Path | str,
+    skip_rows: int = 1,
+    seed: t.Optional[int] = None,
+) -> tuple[CompartmentWorld, dict[str, tuple[float, float]]]:
+    cities, cities_pos = load_cities(
+        file_cities,
+        file_connections,
+        skip_rows=skip_rows,
+    )
+    city_groups = load_city_groups(
+        file_city_groups,
+        cities,
+        skip_rows=skip_rows,
+    )
+    people = load_people(file_people, cities, skip_rows=skip_rows)
+    world = CompartmentWorld(
+        people,
+        list(cities.values()),
+        city_groups,
+        seed=seed,
+    )
+    return world, cities_pos
@@ -157,7 +157,7 @@ def draw_interpolation(
     for i, person in enumerate(zip(next_people, prev_people)):
         next_person, previous_person = person
 
-        if next_person.position == previous_person.position:
+        if next_person.position.id == previous_person.position.id:
             x, y = calc_person_position(
                 cities_pos[next_person.position.name],
                 person_radius,
@@ -333,6 +333,7 @@ def plot_anim(config: PlotConfig) -> None:
         config.file_connections,
         config.file_city_groups,
         config.file_people,
+        seed=config.seed,
     )
     fig, axis = plt.subplots()
 
@@ -1,16 +1,57 @@
+from __future__ import annotations
+import collections
 import csv
+import gzip
+import os
 from pathlib import Path
+import typing as t
 
+import numpy as np
+
+from .columnar import (
+    read_columnar_snapshot,
+    write_columnar_snapshot,
+)
 from .config import (
     SnapshotConfig,
     load_snapshot_config,
 )
-from .load import load_world
+from .load import (
+    load_array_world,
+    load_compartment_world,
+    load_ensemble_world,
+    load_world,
+)
+from .trajectory import (
+    TrajectoryReader,
+    TrajectoryWriter,
+)
 from .utils import (
     check_city_def,
     check_nullable_int,
     check_state,
 )
+from .writer import (
+    BackgroundWriter,
+    Replicates_t,
+)
+from ..array_world import (
+    CODE_E,
+    CODE_I,
+    NO_REMAINING_STEPS,
+    STATE_CODES,
+    STATES,
+    ArrayWorld,
+)
+from ..city import City
+from ..compartment import CompartmentWorld
+from ..ensemble import EnsembleWorld
+from ..hybrid import HybridWorld
+from ..shard import ShardedWorld
+from ..person import (
+    Person,
+    PersonState,
+)
 from ..world import World
 
 
@@ -20,10 +61,52 @@ FIELDS_SNAPSHOTS = (
     "remaining_steps_for_onset",
     "remaining_steps_for_recover",
 )
+FILE_ABSORBED = "ABSORBED"
+FILE_TRAJECTORY = "trajectory.traj"
+# NOTE
+#   CSV snapshots have no header to tell that their rows are not in the order
+#   of the people of the inputs, so this file is put next to them instead.
+FILE_UNORDERED = "UNORDERED"
+
+# NOTE
+#   The format of a snapshot is told by the suffix of its file.
+SUFFIXES_SNAPSHOT = {
+    "csv": ".csv",
+    "columnar": ".snap",
+}
+SUFFIXES_COMPRESSION = {
+    "gzip": ".gz",
+}
 
 
-def snapshot_world(world: World, file: Path | str) -> None:
-    with open(file, "wt") as f:
+def snapshot_world(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+    file: Path | str,
+) -> None:
+    if isinstance(world, CompartmentWorld):
+        snapshot_compartment_world(world, file)
+        return
+    if isinstance(world, EnsembleWorld):
+        snapshot_ensemble_world(world, file)
+        return
+    if isinstance(world, ShardedWorld):
+        snapshot_array_world(world.world, file)
+        return
+    if isinstance(world, ArrayWorld):
+        snapshot_array_world(world, file)
+        return
+    if Path(file).suffix == SUFFIXES_SNAPSHOT["columnar"]:
+        _write_snapshot_arrays(
+            file,
+            world.cities,
+            *_people_arrays(world.people, world.cities),
+        )
+        return
+
+    _mark_order(file, True)
+    with _open_csv(file, "wt") as f:
         writer = csv.writer(f, lineterminator="\n")
         writer.writerow(FIELDS_SNAPSHOTS)
 
@@ -36,26 +119,497 @@ def snapshot_world(world: World, file: Path | str) -> None:
             ])
 
 
-def run_with_snapshots(config: SnapshotConfig) -> None:
-    digits = len(str(config.steps))
+def snapshot_array_world(world: ArrayWorld, file: Path | str) -> None:
+    _write_snapshot_arrays(
+        file,
+        world.cities,
+        world.states,
+        world.positions,
+        world.remaining_steps_for_onset,
+        world.remaining_steps_for_recover,
+    )
+
+
+def snapshot_ensemble_world(world: EnsembleWorld, file: Path | str) -> None:
+    # NOTE
+    #   The snapshot of each replicate is written to the file of the same
+    #   name in the directory of the replicate next to `file`.
+    file = Path(file)
+    for r, arrays in enumerate(_replicate_arrays(world)):
+        dir_replicate = _replicate_dir(file.parent, r, world.num_replicates)
+        _write_snapshot_arrays(
+            dir_replicate / file.name,
+            world.cities,
+            *arrays,
+        )
+
+
+def snapshot_compartment_world(
+    world: CompartmentWorld,
+    file: Path | str,
+) -> None:
+    _write_snapshot_arrays(
+        file,
+        world.cities,
+        *_compartment_arrays(world),
+        ordered=False,
+    )
+
+
+def _compartment_arrays(world: CompartmentWorld) -> tuple[np.ndarray, ...]:
+    # NOTE
+    #   A row is made for each person in the counts by city and bin, not in
+    #   the order of the people of the inputs. The tracked people of a
+    #   `HybridWorld` come first, in their order.
+    counts = world.counts.sum(axis=0)
+    cities, bins = np.nonzero(counts)
+    repeats = counts[cities, bins]
+    bins = np.repeat(bins, repeats)
+    states = world.state_of_bins()[bins]
+    remaining_steps = world.remaining_steps_of_bins()[bins]
+    arrays = (
+        states,
+        np.repeat(cities, repeats),
+        np.where(states == CODE_E, remaining_steps, NO_REMAINING_STEPS),
+        np.where(states == CODE_I, remaining_steps, NO_REMAINING_STEPS),
+    )
+
+    if isinstance(world, HybridWorld):
+        arrays = tuple(
+            np.concatenate(pair)
+            for pair in zip(
+                _people_arrays(world.tracked, world.cities),
+                arrays,
+            )
+        )
+    return arrays
+
+
+def _replicate_arrays(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+) -> list[tuple[np.ndarray, ...]]:
+    # NOTE
+    #   The arrays of the snapshot of each replicate of `world`, which is
+    #   only one unless `world` is an `EnsembleWorld`.
+    if isinstance(world, EnsembleWorld):
+        positions = world.positions
+        return [
+            (
+                world.states[r],
+                positions[r],
+                world.remaining_steps_for_onset[r],
+                world.remaining_steps_for_recover[r],
+            )
+            for r in range(world.num_replicates)
+        ]
+    if isinstance(world, CompartmentWorld):
+        return [_compartment_arrays(world)]
+    if isinstance(world, ShardedWorld):
+        world = world.world
+    if isinstance(world, ArrayWorld):
+        return [(
+            world.states,
+            world.positions,
+            world.remaining_steps_for_onset,
+            world.remaining_steps_for_recover,
+        )]
+    return [_people_arrays(world.people, world.cities)]
+
+
+def _replicate_dir(dir_parent: Path, r: int, num_replicates: int) -> Path:
+    digits = len(str(num_replicates - 1))
+    dir_replicate = dir_parent / str(r).zfill(digits)
+    if not dir_replicate.exists():
+        dir_replicate.mkdir()
+    return dir_replicate
+
+
+def _people_arrays(
+    people: tuple[Person],
+    cities: tuple[City],
+) -> tuple[np.ndarray, ...]:
+    def nullable(val: int | None) -> int:
+        return NO_REMAINING_STEPS if val is None else val
+
+    index = {city: i for i, city in enumerate(cities)}
+    return (
+        np.array(
+            [STATE_CODES[person.state] for person in people],
+            dtype=np.int8,
+        ),
+        np.array(
+            [index[person.position] for person in people],
+            dtype=np.int64,
+        ),
+        np.array(
+            [nullable(person.remaining_steps_for_onset) for person in people],
+            dtype=np.int64,
+        ),
+        np.array(
+            [nullable(p.remaining_steps_for_recover) for p in people],
+            dtype=np.int64,
+        ),
+    )
 
+
+def _write_snapshot_arrays(
+    file: Path | str,
+    cities: tuple[City],
+    states: np.ndarray,
+    positions: np.ndarray,
+    remaining_steps_for_onset: np.ndarray,
+    remaining_steps_for_recover: np.ndarray,
+    ordered: bool = True,
+) -> None:
+    city_names = [city.name for city in cities]
+    if Path(file).suffix == SUFFIXES_SNAPSHOT["columnar"]:
+        write_columnar_snapshot(
+            file,
+            city_names,
+            states,
+            positions,
+            remaining_steps_for_onset,
+            remaining_steps_for_recover,
+            ordered=ordered,
+        )
+        return
+
+    state_names = [state.name for state in STATES]
+
+    def nullable(vals: list[int]) -> list[int | None]:
+        return [None if val == NO_REMAINING_STEPS else val for val in vals]
+
+    _mark_order(file, ordered)
+    with _open_csv(file, "wt") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(FIELDS_SNAPSHOTS)
+        writer.writerows(zip(
+            [state_names[code] for code in states.tolist()],
+            [city_names[i] for i in positions.tolist()],
+            nullable(remaining_steps_for_onset.tolist()),
+            nullable(remaining_steps_for_recover.tolist()),
+        ))
+
+
+def _people_in_order(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+) -> bool:
+    # NOTE
+    #   The rows of the snapshots of a `CompartmentWorld` are made from its
+    #   counts, so they are not in the order of the people of the inputs.
+    return not isinstance(world, CompartmentWorld)
+
+
+def _mark_order(file: Path | str, ordered: bool) -> None:
+    marker = Path(file).parent / FILE_UNORDERED
+    if not ordered:
+        marker.touch()
+    elif marker.exists():
+        marker.unlink()
+
+
+def _open_csv(file: Path | str, mode: str) -> t.TextIO:
+    if Path(file).suffix == SUFFIXES_COMPRESSION["gzip"]:
+        return gzip.open(file, mode)
+    return open(file, mode)
+
+
+def _fsync(file: Path | str) -> None:
+    fd = os.open(file, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def run_with_snapshots(config: SnapshotConfig) -> None:
     dir_snapshots = Path(config.dir_snapshots).resolve()
     if not dir_snapshots.exists():
         dir_snapshots.mkdir()
 
-    world, _ = load_world(
+    files = (
         config.file_cities,
         config.file_connections,
         config.file_city_groups,
         config.file_people,
     )
+    if config.engine == "object":
+        world, _ = load_world(*files, seed=config.seed)
+    elif config.engine == "ensemble":
+        world, _ = load_ensemble_world(
+            *files,
+            config.num_replicates,
+            seed=config.seed,
+        )
+    elif config.engine == "compartment":
+        world, _ = load_compartment_world(*files, seed=config.seed)
+    else:
+        world, _ = load_array_world(*files, seed=config.seed)
+
+    run_world_with_snapshots(world, config, dir_snapshots)
+
+
+def run_world_with_snapshots(
+    world: World | ArrayWorld | EnsembleWorld | CompartmentWorld,
+    config: SnapshotConfig,
+    dir_snapshots: Path,
+) -> None:
+    # NOTE
+    #   An `ArrayWorld` runs on shards if the engine of `config` is sharded.
+    if config.engine == "sharded" and isinstance(world, ArrayWorld):
+        with ShardedWorld(world, config.num_shards) as sharded_world:
+            _run_with_snapshots(sharded_world, config, dir_snapshots)
+    else:
+        _run_with_snapshots(world, config, dir_snapshots)
+
+
+def _run_with_snapshots(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+    config: SnapshotConfig,
+    dir_snapshots: Path,
+) -> None:
+    compression = config.snapshot_compression
+    if compression is not None and config.snapshot_format != "csv":
+        raise ValueError(
+            f"'snapshot_compression' is not supported for the "
+            f"'{config.snapshot_format}' format."
+        )
+
+    if config.snapshot_format != "trajectory":
+        digits = len(str(config.steps))
+        suffix = SUFFIXES_SNAPSHOT[config.snapshot_format]
+        if compression is not None:
+            suffix += SUFFIXES_COMPRESSION[compression]
+
+        def write(i: int, replicates: Replicates_t) -> None:
+            name = f"{str(i).zfill(digits)}{suffix}"
+            for r, arrays in enumerate(replicates):
+                if isinstance(world, EnsembleWorld):
+                    dir_replicate = _replicate_dir(
+                        dir_snapshots,
+                        r,
+                        world.num_replicates,
+                    )
+                    file = dir_replicate / name
+                else:
+                    file = dir_snapshots / name
+
+                _write_snapshot_arrays(
+                    file,
+                    world.cities,
+                    *arrays,
+                    ordered=_people_in_order(world),
+                )
+                if config.snapshot_fsync:
+                    _fsync(file)
+
+        _run_steps_writing(world, config, dir_snapshots, write)
+        return
+
+    # NOTE
+    #   A trajectory of each replicate replaces its files of the steps.
+    replicates = _replicate_arrays(world)
+    if isinstance(world, EnsembleWorld):
+        files = [
+            _replicate_dir(dir_snapshots, r, len(replicates)) / FILE_TRAJECTORY
+            for r in range(len(replicates))
+        ]
+    else:
+        files = [dir_snapshots / FILE_TRAJECTORY]
+
+    city_names = [city.name for city in world.cities]
+    writers: list[TrajectoryWriter] = []
+    try:
+        for file, arrays in zip(files, replicates):
+            writers.append(TrajectoryWriter(
+                file,
+                city_names,
+                len(arrays[0]),
+                config.keyframe_interval,
+                ordered=_people_in_order(world),
+            ))
+
+        def write_trajectories(i: int, replicates: Replicates_t) -> None:
+            for writer, arrays in zip(writers, replicates):
+                writer.append(i, *arrays)
+                if config.snapshot_fsync:
+                    writer.sync()
+
+        _run_steps_writing(world, config, dir_snapshots, write_trajectories)
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+def _run_steps_writing(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+    config: SnapshotConfig,
+    dir_snapshots: Path,
+    write: t.Callable[[int, Replicates_t], None],
+) -> None:
+    if config.snapshot_queue_size == 0:
+        def save(i: int) -> None:
+            write(i, _replicate_arrays(world))
+
+        _run_steps(world, config, dir_snapshots, save)
+        return
+
+    # NOTE
+    #   The snapshots are encoded and written on a thread while the world
+    #   goes on, so they are copied from the arrays updated in place.
+    with BackgroundWriter(write, config.snapshot_queue_size) as writer:
+        def submit(i: int) -> None:
+            replicates = [
+                tuple(np.array(array) for array in arrays)
+                for arrays in _replicate_arrays(world)
+            ]
+            writer.submit(i, replicates)
+
+        _run_steps(world, config, dir_snapshots, submit)
+
+
+def _run_steps(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+    config: SnapshotConfig,
+    dir_snapshots: Path,
+    save: t.Callable[[int], None],
+) -> None:
+    # NOTE
+    #   Step `i` is the state after `i` updates, so step 0 is the state at
+    #   the beginning. Only the steps selected by `config` are saved, except
+    #   that the last step is always saved when the run stops on absorbing.
+    is_selected = _snapshot_selector(world, config)
     for i in range(0, config.steps + 1):
-        path_snapshot = dir_snapshots / f"{str(i).zfill(digits)}.csv"
-        if i == 0:
-            snapshot_world(world, path_snapshot)
+        if i > 0:
+            if config.on_absorbing == "movement" and world.is_absorbing:
+                world.update_movement()
+            else:
+                world.update()
+
+        selected = is_selected(i)
+        if config.on_absorbing == "stop" and world.is_absorbing:
+            save(i)
+            with open(dir_snapshots / FILE_ABSORBED, "wt") as f:
+                f.write(f"{world.step}\n")
+            return
+
+        if selected:
+            save(i)
+
+
+def _snapshot_selector(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+    config: SnapshotConfig,
+) -> t.Callable[[int], bool]:
+    # NOTE
+    #   Returns whether a step is selected, which must be called once for
+    #   every step in order because triggers compare it with the steps
+    #   before.
+    interval = config.snapshot_interval
+    steps = _parse_snapshot_steps(config.snapshot_steps or [])
+    on_lockdown_change = config.snapshot_on_lockdown_change
+    on_infected_change = config.snapshot_on_infected_change
+
+    if interval is not None and interval < 1:
+        raise ValueError("'snapshot_interval' must be positive.")
+    if on_infected_change is not None and on_infected_change < 0:
+        raise ValueError("'snapshot_on_infected_change' must not be negative.")
+    if (
+        interval is None
+        and config.snapshot_steps is None
+        and not on_lockdown_change
+        and on_infected_change is None
+    ):
+        return lambda i: True
+
+    last_lockdown = _group_in_lockdown(world)
+    last_infected = _count_infected(world)
+
+    def is_selected(i: int) -> bool:
+        nonlocal last_lockdown, last_infected
+        selected = (interval is not None and i % interval == 0) or i in steps
 
-        world.update()
-        snapshot_world(world, path_snapshot)
+        if on_lockdown_change:
+            lockdown = _group_in_lockdown(world)
+            selected |= not np.array_equal(lockdown, last_lockdown)
+            last_lockdown = lockdown
+
+        # NOTE
+        #   The number of infected people is compared with that of the last
+        #   snapshot, so that slow changes are also caught.
+        if on_infected_change is not None:
+            infected = _count_infected(world)
+            changed = np.abs(infected - last_infected)
+            selected |= bool(np.any(
+                changed > on_infected_change * last_infected
+            ))
+            if selected:
+                last_infected = infected
+
+        return selected
+
+    return is_selected
+
+
+def _parse_snapshot_steps(values: list[int | str]) -> set[int]:
+    # NOTE
+    #   A value is a step or an inclusive range of steps like "10-20".
+    steps: set[int] = set()
+    for value in values:
+        if isinstance(value, int):
+            steps.add(value)
+            continue
+
+        first, sep, last = value.partition("-")
+        try:
+            if sep:
+                steps.update(range(int(first), int(last) + 1))
+            else:
+                steps.add(int(first))
+        except ValueError:
+            raise ValueError(
+                f"'{value}' in 'snapshot_steps' is neither a step nor a "
+                "range of steps."
+            ) from None
+    return steps
+
+
+def _group_in_lockdown(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+) -> np.ndarray:
+    if isinstance(world, ShardedWorld):
+        world = world.world
+    if isinstance(world, World):
+        return np.array([group.in_lockdown for group in world.city_groups])
+    return world.group_in_lockdown.copy()
+
+
+def _count_infected(
+    world: (
+        World | ArrayWorld | ShardedWorld | EnsembleWorld | CompartmentWorld
+    ),
+) -> np.ndarray:
+    # NOTE
+    #   The number of infected people of each replicate of `world`.
+    if isinstance(world, ShardedWorld):
+        world = world.world
+    if isinstance(world, World):
+        return np.array([world.count_people()[PersonState.I]])
+    return np.asarray(world.count_people())[..., CODE_I]
 
 
 def load_world_from_snapshot(
@@ -66,42 +620,292 @@ def load_world_from_snapshot(
     file_people: Path | str,
     skip_rows: int = 1,
 ) -> tuple[World, dict[str, tuple[float, float]]]:
-    world, cities_pos = load_world(
+    # NOTE
+    #   Use `SnapshotReader` to load many snapshots of the same inputs.
+    reader = SnapshotReader(
         file_cities,
         file_connections,
         file_city_groups,
         file_people,
+        skip_rows=skip_rows,
+        cache_size=0,
     )
-    cities = {city.name: city for city in world.cities}
+    with reader:
+        world = reader.load(file_snapshot)
+    return (world, reader.cities_pos)
 
-    with open(file_snapshot, "rt") as f:
-        reader = csv.reader(f, FIELDS_SNAPSHOTS)
 
-        for i, (person, row) in enumerate(zip(world.people, reader)):
-            if i < skip_rows:
-                continue
-            line = i + 1
+def _raise_unordered(file_snapshot: Path | str) -> t.NoReturn:
+    # NOTE
+    #   The rows of a snapshot are applied to the people by position.
+    raise ValueError(
+        f"'{str(file_snapshot)}': the rows are not in the order of the "
+        "people, as in the snapshots of a compartment world, so they cannot "
+        "be loaded into people."
+    )
+
+
+class _LockdownStatus(t.NamedTuple):
+
+    group_in_lockdown: tuple[bool, ...]
+    locked: bytes
+    applied: frozenset[int]
 
-            (state, city_name, remaining_steps_for_onset,
-             remaining_steps_for_recover) = row
 
-            person._state = check_state(state, file_snapshot, line)
-            person._remaining_steps_for_onset = check_nullable_int(
-                remaining_steps_for_onset,
-                file_snapshot,
-                line,
+class _DecodedSnapshot(t.NamedTuple):
+
+    arrays: tuple[np.ndarray, ...]
+    lockdown: list[t.Optional[_LockdownStatus]]
+
+
+class SnapshotReader:
+
+    def __init__(
+        self,
+        file_cities: Path | str,
+        file_connections: Path | str,
+        file_city_groups: Path | str,
+        file_people: Path | str,
+        skip_rows: int = 1,
+        cache_size: int = 16,
+    ) -> None:
+        # NOTE
+        #   The inputs are parsed once into a world, and each snapshot is
+        #   applied to the people of the world in place. The last
+        #   `cache_size` snapshots are kept decoded with the lockdown they
+        #   lead to, so loading one of them again skips the parsing and the
+        #   evaluation of the lockdown.
+        self._world, self._cities_pos = load_world(
+            file_cities,
+            file_connections,
+            file_city_groups,
+            file_people,
+        )
+        self._skip_rows = skip_rows
+        self._cache_size = cache_size
+        self._cache: collections.OrderedDict[
+            tuple[str, t.Optional[int]],
+            _DecodedSnapshot,
+        ] = collections.OrderedDict()
+        self._trajectories: dict[str, TrajectoryReader] = {}
+
+        self._cities = {city.name: city for city in self._world.cities}
+        self._city_index = {
+            city: i for i, city in enumerate(self._world.cities)
+        }
+        self._graph = (
+            self._world.cities[0].graph if self._world.cities else None
+        )
+        self._initial_lockdown = self._lockdown_status()
+
+        # NOTE
+        #   The arrays of the people as last applied at `_applied_step` of
+        #   the world, against which a snapshot is applied incrementally.
+        self._applied = _people_arrays(self._world.people, self._world.cities)
+        self._applied_step = self._world.step
+
+    def __enter__(self) -> SnapshotReader:
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    @property
+    def world(self) -> World:
+        return self._world
+
+    @property
+    def cities_pos(self) -> dict[str, tuple[float, float]]:
+        return self._cities_pos
+
+    def load(self, file_snapshot: Path | str, step: int = 0) -> World:
+        # NOTE
+        #   `step` is only for a trajectory. The returned world is always
+        #   the same, so keep copies of its people to compare snapshots.
+        key = (str(Path(file_snapshot).resolve()), step)
+        decoded = self._cache.get(key)
+        if decoded is None:
+            decoded = _DecodedSnapshot(
+                self._decode(file_snapshot, step),
+                [None],
             )
-            person._remaining_steps_for_recover = check_nullable_int(
-                remaining_steps_for_recover,
-                file_snapshot,
-                line,
+            if self._cache_size > 0:
+                self._cache[key] = decoded
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+
+        self._apply(*decoded.arrays)
+        if decoded.lockdown[0] is None:
+            self._restore_lockdown(self._initial_lockdown)
+            self._world.reevaluate_lockdown()
+            decoded.lockdown[0] = self._lockdown_status()
+        else:
+            self._restore_lockdown(decoded.lockdown[0])
+        return self._world
+
+    def close(self) -> None:
+        for reader in self._trajectories.values():
+            reader.close()
+        self._trajectories.clear()
+
+    def _decode(
+        self,
+        file_snapshot: Path | str,
+        step: int,
+    ) -> tuple[np.ndarray, ...]:
+        suffix = Path(file_snapshot).suffix
+        if suffix == SUFFIXES_SNAPSHOT["columnar"]:
+            snapshot = read_columnar_snapshot(file_snapshot)
+        elif suffix == Path(FILE_TRAJECTORY).suffix:
+            key = str(Path(file_snapshot).resolve())
+            if key not in self._trajectories:
+                self._trajectories[key] = TrajectoryReader(file_snapshot)
+            snapshot = self._trajectories[key].read(step)
+        else:
+            return self._decode_csv(file_snapshot)
+
+        if not snapshot.ordered:
+            _raise_unordered(file_snapshot)
+        num_people = len(self._world.people)
+        if len(snapshot.states) != num_people:
+            raise ValueError(
+                f"'{str(file_snapshot)}': {len(snapshot.states)} people are "
+                f"found, but {num_people} are defined."
             )
-            person._position = check_city_def(
-                city_name,
-                cities,
-                file_snapshot,
-                line,
+
+        positions = np.array(
+            [
+                self._city_index[
+                    check_city_def(name, self._cities, file_snapshot, 0)
+                ]
+                for name in snapshot.cities
+            ],
+            dtype=np.int64,
+        )
+        return (
+            np.array(snapshot.states),
+            positions[snapshot.positions],
+            np.array(snapshot.remaining_steps_for_onset),
+            np.array(snapshot.remaining_steps_for_recover),
+        )
+
+    def _decode_csv(self, file_snapshot: Path | str) -> tuple[np.ndarray, ...]:
+        if (Path(file_snapshot).parent / FILE_UNORDERED).exists():
+            _raise_unordered(file_snapshot)
+
+        def nullable(raw: str, line: int) -> int:
+            val = check_nullable_int(raw, file_snapshot, line)
+            return NO_REMAINING_STEPS if val is None else val
+
+        rows: list[tuple[int, int, int, int]] = []
+        with _open_csv(file_snapshot, "rt") as f:
+            reader = csv.reader(f)
+            for _ in range(self._skip_rows):
+                next(reader, None)
+
+            for line, row in enumerate(reader, start=self._skip_rows + 1):
+                (state, city_name, remaining_steps_for_onset,
+                 remaining_steps_for_recover) = row
+
+                city = check_city_def(
+                    city_name,
+                    self._cities,
+                    file_snapshot,
+                    line,
+                )
+                rows.append((
+                    STATE_CODES[check_state(state, file_snapshot, line)],
+                    self._city_index[city],
+                    nullable(remaining_steps_for_onset, line),
+                    nullable(remaining_steps_for_recover, line),
+                ))
+
+        num_people = len(self._world.people)
+        if len(rows) != num_people:
+            raise ValueError(
+                f"'{str(file_snapshot)}': {len(rows)} people are found, but "
+                f"{num_people} are defined."
             )
 
-    world._lockdown()
-    return (world, cities_pos)
+        columns = tuple(zip(*rows)) if rows else ((),) * 4
+        return tuple(
+            np.array(column, dtype=np.int64) for column in columns
+        )
+
+    def _apply(
+        self,
+        states: np.ndarray,
+        positions: np.ndarray,
+        remaining_steps_for_onset: np.ndarray,
+        remaining_steps_for_recover: np.ndarray,
+    ) -> None:
+        # NOTE
+        #   Only the people differing from the last snapshot applied are
+        #   told to the world, unless the world has been updated since.
+        changed = None
+        if self._world.step == self._applied_step:
+            changed = np.logical_or.reduce([
+                array != prev
+                for array, prev in zip(
+                    (
+                        states,
+                        positions,
+                        remaining_steps_for_onset,
+                        remaining_steps_for_recover,
+                    ),
+                    self._applied,
+                )
+            ])
+
+        self._world._apply_people_arrays(
+            states,
+            positions,
+            remaining_steps_for_onset,
+            remaining_steps_for_recover,
+            changed=changed,
+        )
+        self._applied = (
+            states,
+            positions,
+            remaining_steps_for_onset,
+            remaining_steps_for_recover,
+        )
+        self._applied_step = self._world.step
+
+    def _lockdown_status(self) -> _LockdownStatus:
+        city_groups = self._world.city_groups
+        return _LockdownStatus(
+            tuple(city_group.in_lockdown for city_group in city_groups),
+            bytes(self._graph.locked) if self._graph is not None else b"",
+            frozenset(
+                i for i, city_group in enumerate(city_groups)
+                if city_group in self._world._lockdown_applied
+            ),
+        )
+
+    def _restore_lockdown(self, status: _LockdownStatus) -> None:
+        # NOTE
+        #   A connection is enabled if and only if neither of its cities is
+        #   locked, so locking or unlocking only the cities that differ
+        #   restores the connections as well.
+        city_groups = self._world.city_groups
+        for city_group, in_lockdown in zip(
+            city_groups,
+            status.group_in_lockdown,
+        ):
+            city_group._in_lockdown = in_lockdown
+        self._world._lockdown_applied = {
+            city_groups[i] for i in status.applied
+        }
+
+        if self._graph is None:
+            return
+        for i, locked in enumerate(status.locked):
+            if locked == self._graph.locked[i]:
+                continue
+            if locked:
+                self._graph.lock(i)
+            else:
+                self._graph.unlock(i)
@@ -0,0 +1,205 @@
+from concurrent import futures
+import copy
+import csv
+import itertools
+from pathlib import Path
+import typing as t
+
+import numpy as np
+
+from .config import SweepConfig
+from .load import load_world
+from .snapshot import run_world_with_snapshots
+from .. import (
+    ArrayWorld,
+    CompartmentWorld,
+    EnsembleWorld,
+    World,
+    branch_world,
+    run_burn_in,
+    set_cohort_params,
+    set_lockdown_regulation,
+)
+from ..array_world import CODE_I
+
+
+PARAMS_SWEEP = ("p_infection", "action_regulation", "lockdown_regulation")
+FIELDS_SWEEP = ("name", *PARAMS_SWEEP, "attempts", "error")
+FILE_SWEEP = "sweep.csv"
+FILE_BURN_IN = "BURN_IN"
+
+
+class SweepPoint(t.NamedTuple):
+
+    p_infection: t.Optional[float] = None
+    action_regulation: t.Optional[float] = None
+    lockdown_regulation: t.Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        name = ",".join(
+            f"{param}={val}" for param, val in zip(PARAMS_SWEEP, self)
+            if val is not None
+        )
+        return name or "default"
+
+
+def make_sweep_points(config: SweepConfig) -> list[SweepPoint]:
+    # NOTE
+    #   Parameters without values in `config` are left as in the inputs.
+    grid = [getattr(config, param) or [None] for param in PARAMS_SWEEP]
+    return [SweepPoint(*vals) for vals in itertools.product(*grid)]
+
+
+def apply_sweep_point(
+    world: World | ArrayWorld | CompartmentWorld,
+    point: SweepPoint,
+) -> None:
+    set_cohort_params(
+        world,
+        p_infection=point.p_infection,
+        action_regulation=point.action_regulation,
+    )
+    if point.lockdown_regulation is not None:
+        set_lockdown_regulation(world, point.lockdown_regulation)
+
+
+def run_sweep(config: SweepConfig) -> list[SweepPoint]:
+    # NOTE
+    #   The inputs are parsed once and every point starts from a copy of the
+    #   same world, including the random streams. After a burn-in, points
+    #   branch from the burnt-in world with their own substreams instead.
+    #   A point is run again up to `max_retries` times if it fails, and the
+    #   failed points are returned.
+    dir_sweep = Path(config.dir_snapshots).resolve()
+    if not dir_sweep.exists():
+        dir_sweep.mkdir()
+
+    world, _ = load_world(
+        config.file_cities,
+        config.file_connections,
+        config.file_city_groups,
+        config.file_people,
+        seed=config.seed,
+    )
+    if config.engine == "compartment":
+        world = CompartmentWorld.from_world(world, seed=world.rng)
+    elif config.engine != "object":
+        world = ArrayWorld.from_world(world, seed=world.rng)
+
+    burn_in = 0
+    if config.burn_in_steps > 0:
+        burn_in = _run_burn_in(world, config)
+        with open(dir_sweep / FILE_BURN_IN, "wt") as f:
+            f.write(f"{burn_in}\n")
+
+    points = make_sweep_points(config)
+    attempts = {point: 0 for point in points}
+    errors: dict[SweepPoint, str] = {}
+
+    queue = points
+    while queue:
+        # NOTE
+        #   A new pool is used for each round of retries since a crashed
+        #   worker breaks the whole pool.
+        with futures.ProcessPoolExecutor(
+            max_workers=config.num_processes,
+            initializer=_init_worker,
+            initargs=(world,),
+        ) as executor:
+            running = {
+                executor.submit(
+                    _run_point,
+                    points.index(point),
+                    point,
+                    config,
+                    dir_sweep,
+                    burn_in > 0,
+                ): point
+                for point in queue
+            }
+            queue = []
+            for future in futures.as_completed(running):
+                point = running[future]
+                attempts[point] += 1
+                try:
+                    future.result()
+                    errors.pop(point, None)
+                except Exception as e:
+                    errors[point] = repr(e)
+                    if attempts[point] <= config.max_retries:
+                        queue.append(point)
+
+    with open(dir_sweep / FILE_SWEEP, "wt") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(FIELDS_SWEEP)
+        for point in points:
+            writer.writerow([
+                point.name,
+                *point,
+                attempts[point],
+                errors.get(point),
+            ])
+
+    return [point for point in points if point in errors]
+
+
+def _run_burn_in(
+    world: World | ArrayWorld | CompartmentWorld,
+    config: SweepConfig,
+) -> int:
+    # NOTE
+    #   Until a city group reaches the smallest lockdown regulation of the
+    #   inputs and the points, no point can have locked any group down, so
+    #   points differing only in lockdown regulations share the burn-in
+    #   exactly once the lockdown is evaluated again with their own values.
+    if not config.burn_in_until_threshold:
+        return run_burn_in(world, config.burn_in_steps)
+
+    threshold = min([
+        *(city_group.lockdown_regulation for city_group in world.city_groups),
+        *(config.lockdown_regulation or []),
+    ])
+
+    def reaches_threshold(
+        world: World | ArrayWorld | CompartmentWorld,
+    ) -> bool:
+        counts = world.count_people_in_city_groups()
+        num_people = counts.sum(axis=1)
+        rate_infected = counts[:, CODE_I] / np.maximum(num_people, 1)
+        return bool(np.any((num_people > 0) & (rate_infected >= threshold)))
+
+    return run_burn_in(world, config.burn_in_steps, reaches_threshold)
+
+
+_base_world: t.Optional[World | ArrayWorld | CompartmentWorld] = None
+
+
+def _init_worker(world: World | ArrayWorld | CompartmentWorld) -> None:
+    global _base_world
+    _base_world = world
+
+
+def _run_point(
+    index: int,
+    point: SweepPoint,
+    config: SweepConfig,
+    dir_sweep: Path,
+    branch: bool,
+) -> None:
+    assert _base_world is not None
+    if branch:
+        world = branch_world(_base_world, index)
+    else:
+        world = copy.deepcopy(_base_world)
+    apply_sweep_point(world, point)
+    if branch:
+        world.reevaluate_lockdown()
+
+    dir_snapshots = dir_sweep / point.name
+    if not dir_snapshots.exists():
+        dir_snapshots.mkdir()
+
+    if config.engine == "ensemble":
+        world = EnsembleWorld(world, config.num_replicates)
+    run_world_with_snapshots(world, config, dir_snapshots)
@@ -0,0 +1,311 @@
+from __future__ import annotations
+import json
+import os
+from pathlib import Path
+import struct
+import typing as t
+
+import numpy as np
+
+from .columnar import (
+    COLUMNS_COLUMNAR,
+    ColumnarSnapshot,
+)
+from ..array_world import (
+    NO_REMAINING_STEPS,
+    STATES,
+)
+
+
+MAGIC_TRAJECTORY = b"SEIRTRAJ"
+VERSION_TRAJECTORY = 2
+
+# NOTE
+#   The trailer at the end of a trajectory is the offset of its index of
+#   records, the number of its records and the magic again. The index is the
+#   offsets of the records followed by their steps.
+_TRAILER = struct.Struct("<QQ8s")
+_COUNT = struct.Struct("<Q")
+# NOTE
+#   The indices of the changed people in a delta, which limits the number of
+#   people of a trajectory.
+_DTYPE_INDEX = "<i4"
+
+
+class TrajectoryWriter:
+
+    def __init__(
+        self,
+        file: Path | str,
+        cities: t.Sequence[str],
+        num_people: int,
+        keyframe_interval: int,
+        ordered: bool = True,
+    ) -> None:
+        # NOTE
+        #   A trajectory is one file of the snapshots of the steps of a run.
+        #   Every `keyframe_interval`-th record is written in full, and the
+        #   others only as the entries of each column differing from the
+        #   previous record with its countdowns advanced to the step, so a
+        #   step is decoded from the nearest keyframe before it. Unless
+        #   `ordered`, the rows are not in the order of the people of the
+        #   inputs.
+        if keyframe_interval < 1:
+            raise ValueError("'keyframe_interval' must be positive.")
+        max_people = np.iinfo(_DTYPE_INDEX).max + 1
+        if num_people > max_people:
+            raise ValueError(
+                f"A trajectory has at most {max_people} people, but "
+                f"{num_people} are given."
+            )
+
+        self._file = file
+        self._num_people = num_people
+        self._keyframe_interval = keyframe_interval
+        self._offsets: list[int] = []
+        self._steps: list[int] = []
+        self._prev: t.Optional[tuple[np.ndarray, ...]] = None
+
+        header = json.dumps({
+            "version": VERSION_TRAJECTORY,
+            "num_people": num_people,
+            "keyframe_interval": keyframe_interval,
+            "states": [state.name for state in STATES],
+            "cities": list(cities),
+            "ordered": ordered,
+        }).encode("utf-8")
+
+        self._f = open(file, "wb")
+        self._f.write(MAGIC_TRAJECTORY)
+        self._f.write(_COUNT.pack(len(header)))
+        self._f.write(header)
+
+    def __enter__(self) -> TrajectoryWriter:
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    @property
+    def steps(self) -> tuple[int, ...]:
+        return tuple(self._steps)
+
+    def append(
+        self,
+        step: int,
+        states: np.ndarray,
+        positions: np.ndarray,
+        remaining_steps_for_onset: np.ndarray,
+        remaining_steps_for_recover: np.ndarray,
+    ) -> None:
+        # NOTE
+        #   The columns are copied, since they are kept for the next step
+        #   while the arrays may be updated in place by a world.
+        columns = tuple(
+            np.array(array, dtype=dtype)
+            for (_, dtype), array in zip(
+                COLUMNS_COLUMNAR,
+                (
+                    states,
+                    positions,
+                    remaining_steps_for_onset,
+                    remaining_steps_for_recover,
+                ),
+            )
+        )
+        if len(columns[0]) != self._num_people:
+            raise ValueError(
+                f"{len(columns[0])} people are given, but the trajectory "
+                f"has {self._num_people}."
+            )
+
+        if self._steps and step <= self._steps[-1]:
+            raise ValueError(
+                f"Step {step} is not after step {self._steps[-1]}, the last "
+                "one in the trajectory."
+            )
+
+        is_keyframe = self._prev is None or self._is_keyframe(len(self._steps))
+        self._offsets.append(self._f.tell())
+        if is_keyframe:
+            for column in columns:
+                self._f.write(column.tobytes())
+        else:
+            # NOTE
+            #   Each column has its own changes, because most people only
+            #   move between steps without changing the other columns.
+            predicted = _advance(self._prev, step - self._steps[-1])
+            for column, prev in zip(columns, predicted):
+                index = np.flatnonzero(column != prev).astype(_DTYPE_INDEX)
+                self._f.write(_COUNT.pack(len(index)))
+                self._f.write(index.tobytes())
+                self._f.write(column[index].tobytes())
+
+        self._prev = columns
+        self._steps.append(step)
+
+    def sync(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+
+        index_offset = self._f.tell()
+        self._f.write(np.array(self._offsets, dtype="<u8").tobytes())
+        self._f.write(np.array(self._steps, dtype="<i8").tobytes())
+        self._f.write(_TRAILER.pack(
+            index_offset,
+            len(self._offsets),
+            MAGIC_TRAJECTORY,
+        ))
+        self._f.close()
+
+    def _is_keyframe(self, record: int) -> bool:
+        return record % self._keyframe_interval == 0
+
+
+class TrajectoryReader:
+
+    def __init__(self, file: Path | str) -> None:
+        self._file = file
+        self._f = open(file, "rb")
+        try:
+            self._read_header()
+        except BaseException:
+            self._f.close()
+            raise
+
+    def _read_header(self) -> None:
+        file = self._file
+        if self._f.read(len(MAGIC_TRAJECTORY)) != MAGIC_TRAJECTORY:
+            raise ValueError(f"'{str(file)}' is not a trajectory.")
+        (length,) = _COUNT.unpack(self._f.read(_COUNT.size))
+        header = json.loads(self._f.read(length).decode("utf-8"))
+
+        if header["version"] != VERSION_TRAJECTORY:
+            raise ValueError(
+                f"'{str(file)}': version {header['version']} of "
+                "trajectories is not supported."
+            )
+        if header["states"] != [state.name for state in STATES]:
+            raise ValueError(f"'{str(file)}': states are not consistent.")
+
+        self._f.seek(-_TRAILER.size, 2)
+        index_offset, num_records, magic = _TRAILER.unpack(
+            self._f.read(_TRAILER.size),
+        )
+        if magic != MAGIC_TRAJECTORY:
+            raise ValueError(
+                f"'{str(file)}': the trajectory was not closed properly."
+            )
+
+        self._f.seek(index_offset)
+        self._offsets = np.fromfile(self._f, dtype="<u8", count=num_records)
+        self._steps = np.fromfile(self._f, dtype="<i8", count=num_records)
+        self._cities: tuple[str, ...] = tuple(header["cities"])
+        self._num_people: int = header["num_people"]
+        self._keyframe_interval: int = header["keyframe_interval"]
+        self._ordered: bool = header.get("ordered", True)
+        self._last: t.Optional[tuple[int, tuple[np.ndarray, ...]]] = None
+
+    def __enter__(self) -> TrajectoryReader:
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __iter__(self) -> t.Iterator[ColumnarSnapshot]:
+        # NOTE
+        #   Replays the steps in order, decoding each delta only once.
+        columns: t.Optional[tuple[np.ndarray, ...]] = None
+        for record in range(len(self)):
+            columns = self._read_record(record, columns)
+            yield self._snapshot(columns)
+
+    @property
+    def cities(self) -> tuple[str, ...]:
+        return self._cities
+
+    @property
+    def steps(self) -> tuple[int, ...]:
+        return tuple(self._steps.tolist())
+
+    @property
+    def num_people(self) -> int:
+        return self._num_people
+
+    @property
+    def keyframe_interval(self) -> int:
+        return self._keyframe_interval
+
+    @property
+    def ordered(self) -> bool:
+        return self._ordered
+
+    def read(self, step: int) -> ColumnarSnapshot:
+        record = int(np.searchsorted(self._steps, step))
+        if record == len(self) or self._steps[record] != step:
+            raise IndexError(f"Step {step} is not in the trajectory.")
+
+        # NOTE
+        #   Decoding goes on from the last step read if it is between the
+        #   keyframe and the step, so reading steps in order decodes each
+        #   delta only once.
+        columns = None
+        begin = record - record % self._keyframe_interval
+        if self._last is not None and begin <= self._last[0] <= record:
+            begin, columns = self._last[0] + 1, self._last[1]
+        for i in range(begin, record + 1):
+            columns = self._read_record(i, columns)
+
+        self._last = (record, columns)
+        return self._snapshot(columns)
+
+    def close(self) -> None:
+        self._f.close()
+
+    def _read_record(
+        self,
+        record: int,
+        prev: t.Optional[tuple[np.ndarray, ...]],
+    ) -> tuple[np.ndarray, ...]:
+        self._f.seek(int(self._offsets[record]))
+        if record % self._keyframe_interval == 0:
+            return tuple(
+                np.fromfile(self._f, dtype=dtype, count=self._num_people)
+                for _, dtype in COLUMNS_COLUMNAR
+            )
+
+        num_steps = int(self._steps[record] - self._steps[record - 1])
+        columns = _advance(prev, num_steps)
+        for column, (_, dtype) in zip(columns, COLUMNS_COLUMNAR):
+            (count,) = _COUNT.unpack(self._f.read(_COUNT.size))
+            index = np.fromfile(self._f, dtype=_DTYPE_INDEX, count=count)
+            column[index] = np.fromfile(self._f, dtype=dtype, count=count)
+        return columns
+
+    def _snapshot(self, columns: tuple[np.ndarray, ...]) -> ColumnarSnapshot:
+        # NOTE
+        #   The next step is decoded from copies of the columns, so they
+        #   are shared read-only instead of being copied for the caller.
+        for column in columns:
+            column.flags.writeable = False
+        return ColumnarSnapshot(self._cities, *columns, self._ordered)
+
+
+def _advance(
+    columns: tuple[np.ndarray, ...],
+    num_steps: int,
+) -> tuple[np.ndarray, ...]:
+    # NOTE
+    #   The columns expected `num_steps` later if nobody moves or changes
+    #   state, where the countdowns of exposed and infected people go down.
+    states, positions, onset, recover = (column.copy() for column in columns)
+    onset[onset != NO_REMAINING_STEPS] -= num_steps
+    recover[recover != NO_REMAINING_STEPS] -= num_steps
+    return states, positions, onset, recover
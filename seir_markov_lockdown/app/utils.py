@@ -1,4 +1,5 @@
 from pathlib import Path
+import typing as t
 
 from ..city import City
 from ..person import PersonState
@@ -61,7 +62,7 @@ def check_nullable_int(
 
 def check_city_def(
     city_name: str,
-    cities: dict[str, City],
+    cities: t.Mapping[str, City],
     file: Path | str,
     line: int,
 ) -> City:
@@ -0,0 +1,73 @@
+from __future__ import annotations
+import queue
+import threading
+import typing as t
+
+import numpy as np
+
+
+Replicates_t = list[tuple[np.ndarray, ...]]
+
+
+class BackgroundWriter:
+
+    def __init__(
+        self,
+        write: t.Callable[[int, Replicates_t], None],
+        max_pending: int,
+    ) -> None:
+        # NOTE
+        #   `write` is called on a thread with each step and its arrays in
+        #   the order of `submit`, while the caller goes on simulating. At
+        #   most `max_pending` snapshots wait for the thread, and `submit`
+        #   blocks until one is written once they are full, so the memory
+        #   stays bounded when writing is slower than simulating.
+        if max_pending < 1:
+            raise ValueError("'max_pending' must be positive.")
+
+        self._write = write
+        self._queue: queue.Queue[t.Optional[tuple[int, Replicates_t]]] = (
+            queue.Queue(max_pending)
+        )
+        self._error: t.Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> BackgroundWriter:
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    def submit(self, step: int, replicates: Replicates_t) -> None:
+        # NOTE
+        #   The arrays must not be modified after they are submitted.
+        self._raise_error()
+        self._queue.put((step, replicates))
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def _run(self) -> None:
+        # NOTE
+        #   After an error, the rest is only drained so that `submit` never
+        #   blocks forever, and the error is raised on the caller.
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+
+            try:
+                self._write(*item)
+            except BaseException as e:
+                self._error = e
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
@@ -0,0 +1,434 @@
+from __future__ import annotations
+import abc
+import typing as t
+
+import numpy as np
+
+from .city import (
+    City,
+    CityGroup,
+)
+from .person import (
+    CODE_E,
+    CODE_I,
+    CODE_R,
+    CODE_S,
+    NO_REMAINING_STEPS,
+    NUM_STATES,
+    STATE_CODES,
+    STATES,
+    Person,
+    PopulationDependentPerson,
+)
+from .rng import (
+    STREAM_INFECTION,
+    STREAM_MOVEMENT,
+    RandomStreams,
+)
+from .world import World
+
+
+# Attributes of `ArrayWorld` holding an array over people.
+_PEOPLE_FIELDS = (
+    "_position",
+    "_state",
+    "_remaining_steps_for_onset",
+    "_remaining_steps_for_recover",
+    "_p_infection",
+    "_p_staying",
+    "_action_regulation",
+    "_steps_for_onset",
+    "_steps_for_recover",
+    "_population_dependent",
+)
+
+
+class _ArrayCities(abc.ABC):
+
+    # NOTE
+    #   Cities, city groups and their lockdown as arrays, shared by the
+    #   worlds on arrays. A subclass counts the people in each city.
+
+    def __init__(
+        self,
+        cities: t.Sequence[City],
+        city_groups: t.Sequence[CityGroup],
+        seed: t.Optional[int | RandomStreams] = None,
+    ) -> None:
+        self._cities = tuple(cities)
+        self._city_groups = tuple(city_groups)
+        self._city_index = {city: i for i, city in enumerate(self._cities)}
+        if isinstance(seed, RandomStreams):
+            self._rng = seed
+        else:
+            self._rng = RandomStreams(seed)
+        self._step = 0
+
+        self._setup_cities()
+        self._setup_city_groups()
+
+    def _setup_cities(self) -> None:
+        index = self._city_index
+        num_cities = len(self._cities)
+
+        degrees = np.zeros(num_cities, dtype=np.int64)
+        targets: list[int] = []
+        for i, city in enumerate(self._cities):
+            visitables = sorted(index[c] for c in city.initial_visitables)
+            degrees[i] = len(visitables)
+            targets.extend(visitables)
+
+        # Compressed adjacency of the initial visitables.
+        self._sources = np.repeat(np.arange(num_cities), degrees)
+        self._targets = np.array(targets, dtype=np.int64)
+        self._in_lockdown = np.array(
+            [city.in_lockdown for city in self._cities],
+            dtype=bool,
+        )
+        self._update_visitables()
+
+    def _setup_city_groups(self) -> None:
+        index = self._city_index
+
+        member_groups: list[int] = []
+        member_cities: list[int] = []
+        for i, city_group in enumerate(self._city_groups):
+            for city in city_group.cities:
+                member_groups.append(i)
+                member_cities.append(index[city])
+
+        self._member_groups = np.array(member_groups, dtype=np.int64)
+        self._member_cities = np.array(member_cities, dtype=np.int64)
+        self._lockdown_regulation = np.array(
+            [group.lockdown_regulation for group in self._city_groups],
+            dtype=np.float64,
+        )
+        self._group_in_lockdown = np.array(
+            [group.in_lockdown for group in self._city_groups],
+            dtype=bool,
+        )
+
+    @property
+    def cities(self) -> tuple[City]:
+        return self._cities
+
+    @property
+    def city_groups(self) -> tuple[CityGroup]:
+        return self._city_groups
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    @property
+    def rng(self) -> RandomStreams:
+        return self._rng
+
+    @property
+    def in_lockdown(self) -> np.ndarray:
+        return self._in_lockdown
+
+    @property
+    def group_in_lockdown(self) -> np.ndarray:
+        return self._group_in_lockdown
+
+    def city_index(self, city: City) -> int:
+        return self._city_index[city]
+
+    def current_visitables(self, city: City) -> tuple[City]:
+        i = self._city_index[city]
+        begin, end = self._current_offsets[i], self._current_offsets[i + 1]
+        return tuple(self._cities[j] for j in self._current_targets[begin:end])
+
+    @abc.abstractmethod
+    def count_people_in_cities(self) -> np.ndarray:
+        # NOTE
+        #   The numbers of people by city and state.
+        ...
+
+    def count_people_in_city_groups(
+        self,
+        counts: t.Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        if counts is None:
+            counts = self.count_people_in_cities()
+
+        result = np.zeros((len(self._city_groups), NUM_STATES), dtype=np.int64)
+        np.add.at(result, self._member_groups, counts[self._member_cities])
+        return result
+
+    def reevaluate_lockdown(self) -> None:
+        # NOTE
+        #   Same as `World.reevaluate_lockdown`.
+        self._lockdown(self.count_people_in_city_groups())
+
+    def _update_visitables(self) -> None:
+        locked = self._in_lockdown
+        enabled = ~(locked[self._sources] | locked[self._targets])
+
+        self._num_visitables = np.bincount(
+            self._sources[enabled],
+            minlength=len(self._cities),
+        )
+        self._current_offsets = np.zeros(len(self._cities) + 1, dtype=np.int64)
+        np.cumsum(self._num_visitables, out=self._current_offsets[1:])
+        self._current_targets = self._targets[enabled]
+
+    def _lockdown(self, counts: np.ndarray) -> None:
+        # NOTE
+        #   `counts` are the numbers of people in the city groups. The masks
+        #   are updated in place since they may live in shared memory.
+        num_people = counts.sum(axis=1)
+        evaluated = num_people > 0
+
+        rate_infected = counts[:, CODE_I] / np.maximum(num_people, 1)
+        decision = rate_infected >= self._lockdown_regulation
+        self._group_in_lockdown[evaluated] = decision[evaluated]
+
+        # NOTE
+        #   A city in several groups follows the last evaluated group like
+        #   the sequential `CityGroup.lock`/`unlock` calls of `World`.
+        applied = np.flatnonzero(evaluated[self._member_groups])
+        if applied.size == 0:
+            return
+
+        last = np.full(len(self._cities), -1, dtype=np.int64)
+        np.maximum.at(last, self._member_cities[applied], applied)
+        decided = np.flatnonzero(last >= 0)
+
+        in_lockdown = self._in_lockdown.copy()
+        in_lockdown[decided] = decision[self._member_groups[last[decided]]]
+        if not np.array_equal(in_lockdown, self._in_lockdown):
+            self._in_lockdown[:] = in_lockdown
+            self._update_visitables()
+
+
+class ArrayWorld(_ArrayCities):
+
+    def __init__(
+        self,
+        people: t.Sequence[Person],
+        cities: t.Sequence[City],
+        city_groups: t.Sequence[CityGroup],
+        seed: t.Optional[int | RandomStreams] = None,
+    ) -> None:
+        super().__init__(cities, city_groups, seed=seed)
+        self._setup_people(people)
+
+    def _setup_people(self, people: t.Sequence[Person]) -> None:
+        index = self._city_index
+
+        def nullable(val: t.Optional[int]) -> int:
+            return NO_REMAINING_STEPS if val is None else val
+
+        def is_population_dependent(person: Person) -> bool:
+            return isinstance(person, PopulationDependentPerson)
+
+        self._position = np.array(
+            [index[person.position] for person in people],
+            dtype=np.int64,
+        )
+        self._state = np.array(
+            [STATE_CODES[person.state] for person in people],
+            dtype=np.int8,
+        )
+        self._remaining_steps_for_onset = np.array(
+            [nullable(person.remaining_steps_for_onset) for person in people],
+            dtype=np.int64,
+        )
+        self._remaining_steps_for_recover = np.array(
+            [nullable(p.remaining_steps_for_recover) for p in people],
+            dtype=np.int64,
+        )
+
+        self._p_infection = np.array(
+            [person.p_infection for person in people],
+            dtype=np.float64,
+        )
+        self._p_staying = np.array(
+            [person.p_staying for person in people],
+            dtype=np.float64,
+        )
+        self._action_regulation = np.array(
+            [person.action_regulation for person in people],
+            dtype=np.float64,
+        )
+        self._steps_for_onset = np.array(
+            [person.steps_for_onset for person in people],
+            dtype=np.int64,
+        )
+        self._steps_for_recover = np.array(
+            [person.steps_for_recover for person in people],
+            dtype=np.int64,
+        )
+        self._population_dependent = np.array(
+            [is_population_dependent(person) for person in people],
+            dtype=bool,
+        )
+
+    @classmethod
+    def from_world(
+        cls,
+        world: World,
+        seed: t.Optional[int | RandomStreams] = None,
+    ) -> ArrayWorld:
+        return cls(world.people, world.cities, world.city_groups, seed=seed)
+
+    @property
+    def is_absorbing(self) -> bool:
+        state = self._state
+        return not np.any((state == CODE_E) | (state == CODE_I))
+
+    @property
+    def population(self) -> int:
+        return len(self._position)
+
+    @property
+    def positions(self) -> np.ndarray:
+        return self._position
+
+    @property
+    def states(self) -> np.ndarray:
+        return self._state
+
+    @property
+    def remaining_steps_for_onset(self) -> np.ndarray:
+        return self._remaining_steps_for_onset
+
+    @property
+    def remaining_steps_for_recover(self) -> np.ndarray:
+        return self._remaining_steps_for_recover
+
+    def count_people_in_cities(self) -> np.ndarray:
+        num_cities = len(self._cities)
+        counts = np.bincount(
+            self._position * NUM_STATES + self._state,
+            minlength=num_cities * NUM_STATES,
+        )
+        return counts.reshape(num_cities, NUM_STATES)
+
+    def count_people(self) -> np.ndarray:
+        return np.bincount(self._state, minlength=NUM_STATES)
+
+    def update(self) -> None:
+        self._step += 1
+        self._update_positions()
+        self._update_states(self.count_people_in_cities())
+        self._lockdown(self.count_people_in_city_groups())
+
+    def update_movement(self) -> None:
+        if not self.is_absorbing:
+            raise ValueError(
+                "The movement-only update is only valid in absorbing states."
+            )
+
+        self._step += 1
+        self._update_positions()
+        self._lockdown(self.count_people_in_city_groups())
+
+    def _select(
+        self,
+        mask: np.ndarray,
+        people: t.Optional[np.ndarray],
+    ) -> np.ndarray:
+        # NOTE
+        #   `mask` is over all people, or over `people` if it is given.
+        if people is None:
+            return np.flatnonzero(mask)
+        return people[mask]
+
+    def _update_positions(
+        self,
+        people: t.Optional[np.ndarray] = None,
+    ) -> None:
+        # NOTE
+        #   Only `people` move if it is given. Draws are per person, so moving
+        #   any subsets separately is the same as moving everyone at once.
+        position = self._position
+        if people is None:
+            num_others = self._num_visitables[position]
+        else:
+            num_others = self._num_visitables[position[people]]
+        movable_mask = num_others > 0
+        movable = self._select(movable_mask, people)
+        if movable.size == 0:
+            return
+
+        # NOTE
+        #   Same weights as `Person.update_position`, including the rescaling
+        #   for infected people; they are normalized by `total` just like
+        #   `random.choices` does.
+        num_others = num_others[movable_mask]
+        p_staying = self._p_staying[movable]
+        weight_others = (1 - p_staying) / num_others
+        infected = self._state[movable] == CODE_I
+        weight_others = np.where(
+            infected,
+            self._action_regulation[movable] * weight_others,
+            weight_others,
+        )
+        weight_staying = np.where(
+            infected,
+            1 - (num_others + 1) * weight_others,
+            p_staying,
+        )
+        total = weight_staying + num_others * weight_others
+
+        x = self._rng.uniform(self._step, STREAM_MOVEMENT, movable) * total
+        moving = (x >= weight_staying) & (weight_others > 0)
+        movers = movable[moving]
+        if movers.size == 0:
+            return
+
+        nth = np.floor(
+            (x[moving] - weight_staying[moving]) / weight_others[moving]
+        ).astype(np.int64)
+        nth = np.minimum(nth, num_others[moving] - 1)
+        begins = self._current_offsets[position[movers]]
+        position[movers] = self._current_targets[begins + nth]
+
+    def _update_states(
+        self,
+        counts: np.ndarray,
+        people: t.Optional[np.ndarray] = None,
+    ) -> None:
+        # NOTE
+        #   Only `people` are updated if it is given; `counts` must include
+        #   everyone in their cities.
+        state = self._state
+        onset = self._remaining_steps_for_onset
+        recover = self._remaining_steps_for_recover
+        states = state if people is None else state[people]
+
+        # S -> E
+        susceptible = self._select(states == CODE_S, people)
+        num_infected = counts[self._position[susceptible], CODE_I]
+        p_infection = self._p_infection[susceptible]
+        p_infection = np.where(
+            self._population_dependent[susceptible],
+            1 - (1 - p_infection)**num_infected,
+            np.where(num_infected > 0, p_infection, 0.),
+        )
+        u = self._rng.uniform(self._step, STREAM_INFECTION, susceptible)
+        infection = u < p_infection
+        exposed_new = susceptible[infection]
+
+        # E -> I
+        exposed = self._select(states == CODE_E, people)
+        onset[exposed] -= 1
+        infected_new = exposed[onset[exposed] <= 0]
+
+        # I -> R
+        infected = self._select(states == CODE_I, people)
+        recover[infected] -= 1
+        recovered_new = infected[recover[infected] <= 0]
+
+        state[exposed_new] = CODE_E
+        onset[exposed_new] = self._steps_for_onset[exposed_new]
+
+        state[infected_new] = CODE_I
+        onset[infected_new] = NO_REMAINING_STEPS
+        recover[infected_new] = self._steps_for_recover[infected_new]
+
+        state[recovered_new] = CODE_R
+        recover[recovered_new] = NO_REMAINING_STEPS
@@ -0,0 +1,105 @@
+from __future__ import annotations
+import copy
+import typing as t
+
+from .array_world import ArrayWorld
+from .compartment import CompartmentWorld
+from .hybrid import HybridWorld
+from .person import (
+    Person,
+    PersonCohort,
+)
+from .world import World
+
+
+World_t = t.TypeVar("World_t", World, ArrayWorld, CompartmentWorld)
+
+
+def run_burn_in(
+    world: World_t,
+    max_steps: int,
+    until: t.Optional[t.Callable[[World_t], bool]] = None,
+) -> int:
+    # NOTE
+    #   Runs `world` for `max_steps` steps, or until `until` holds after a
+    #   step, and returns the number of steps run.
+    for i in range(max_steps):
+        world.update()
+        if until is not None and until(world):
+            return i + 1
+    return max_steps
+
+
+def branch_world(world: World_t, *key: int) -> World_t:
+    # NOTE
+    #   The branch is a copy of `world` continuing with the substream `key`
+    #   of its streams, so branches with different keys are independent
+    #   of each other and of `world`.
+    branched = copy.deepcopy(world)
+    branched._rng = world.rng.substream(*key)
+    return branched
+
+
+def set_lockdown_regulation(
+    world: World_t,
+    lockdown_regulation: float,
+) -> None:
+    # NOTE
+    #   Sets the lockdown regulation of every city group of `world`, e.g. of
+    #   a branch, which must not share its city groups with other worlds.
+    for city_group in world.city_groups:
+        city_group.lockdown_regulation = lockdown_regulation
+    if not isinstance(world, World):
+        world._lockdown_regulation[:] = lockdown_regulation
+
+
+def set_cohort_params(
+    world: World_t,
+    p_infection: t.Optional[float] = None,
+    p_staying: t.Optional[float] = None,
+    action_regulation: t.Optional[float] = None,
+) -> None:
+    # NOTE
+    #   Sets the given parameters of every person of `world`, leaving the
+    #   others as they are. The steps of onset and recovery are not
+    #   changeable since the transitions have been scheduled by them.
+    changes = {
+        param: val
+        for param, val in (
+            ("p_infection", p_infection),
+            ("p_staying", p_staying),
+            ("action_regulation", action_regulation),
+        )
+        if val is not None
+    }
+    for param, val in changes.items():
+        if not (0 <= val <= 1):
+            raise ValueError(f"'{param}' must be in range [0, 1].")
+
+    if isinstance(world, World):
+        _replace_cohorts(world.people, changes)
+        return
+
+    for param, val in changes.items():
+        getattr(world, f"_{param}")[:] = val
+    if isinstance(world, CompartmentWorld):
+        world._classes = tuple(
+            person_class._replace(**changes)
+            for person_class in world.classes
+        )
+    if isinstance(world, HybridWorld):
+        _replace_cohorts(world.tracked, changes)
+
+
+def _replace_cohorts(
+    people: t.Iterable[Person],
+    changes: dict[str, float],
+) -> None:
+    # NOTE
+    #   People sharing a cohort keep sharing the modified one.
+    cohorts: dict[PersonCohort, PersonCohort] = {}
+    for person in people:
+        cohort = person.cohort
+        if cohort not in cohorts:
+            cohorts[cohort] = cohort._replace(**changes)
+        person._cohort = cohorts[cohort]
@@ -1,5 +1,9 @@
 from __future__ import annotations
+from array import array
+import bisect
+from collections import abc
 import typing as t
+import warnings
 
 
 class City:
@@ -8,22 +12,22 @@ class City:
         self,
         name: str,
     ) -> None:
+        # NOTE
+        #   Cities are equal only to themselves; names are only for the
+        #   inputs and outputs, and `CityRegistry` looks cities up by them.
         self._name = name
+        self._id: t.Optional[int] = None
         self._initial_visitables: t.Optional[set[City]] = None
-        self._current_visitables: t.Optional[set[City]] = None
-        self._in_lockdown = False
+        self._graph: t.Optional[CityGraph] = None
+        self._index: t.Optional[int] = None
 
     @property
     def name(self) -> str:
         return self._name
 
-    def __eq__(self, name_city: City | str) -> bool:
-        if isinstance(name_city, City):
-            name_city = name_city.name
-        return self.name == name_city
-
-    def __hash__(self) -> int:
-        return hash(self._name)
+    @property
+    def id(self) -> t.Optional[int]:
+        return self._id
 
     def __str__(self) -> str:
         return f"city: {self._name}"
@@ -33,7 +37,10 @@ class City:
             raise ValueError("Initial visitables have already been set.")
 
         self._initial_visitables = set(visitables)
-        self._current_visitables = set(visitables)
+
+    @property
+    def graph(self) -> t.Optional[CityGraph]:
+        return self._graph
 
     @property
     def initial_visitables(self) -> tuple[City]:
@@ -42,40 +49,238 @@ class City:
 
     @property
     def current_visitables(self) -> tuple[City]:
-        assert self._current_visitables is not None
-        return tuple(self._current_visitables)
+        assert self._graph is not None
+        return self._graph.current_visitables(self._index)
+
+    @property
+    def num_visitables(self) -> int:
+        assert self._graph is not None
+        return self._graph.num_visitables(self._index)
+
+    def nth_visitable(self, nth: int) -> City:
+        assert self._graph is not None
+        return self._graph.nth_visitable(self._index, nth)
 
     @property
     def in_lockdown(self) -> bool:
-        return self._in_lockdown
+        if self._graph is None:
+            return False
+        return self._graph.in_lockdown(self._index)
 
     def lock(self) -> None:
-        assert self._current_visitables is not None
-        self._current_visitables.clear()
-        self._in_lockdown = True
+        assert self._graph is not None
+        self._graph.lock(self._index)
 
     def unlock(self) -> None:
-        assert self._initial_visitables is not None
-
-        visitable = set()
-        for possible in self._initial_visitables:
-            if not possible.in_lockdown:
-                visitable.add(possible)
-
-        self._current_visitables = visitable
-        self._in_lockdown = False
+        assert self._graph is not None
+        self._graph.unlock(self._index)
 
     def reset_visitables(self) -> None:
-        assert self._initial_visitables is not None
-        self._current_visitables = self._initial_visitables.copy()
+        assert self._graph is not None
+        self._graph.reset_visitables(self._index)
 
     def add_visitable(self, city: City) -> None:
-        assert self._current_visitables is not None
-        self._current_visitables.add(city)
+        assert self._graph is not None
+        self._graph.enable(self._index, city._index)
 
     def discard_visitable(self, city: City) -> None:
-        assert self._current_visitables is not None
-        self._current_visitables.discard(city)
+        assert self._graph is not None
+        self._graph.disable(self._index, city._index)
+
+
+class CityRegistry(abc.Mapping[str, City]):
+
+    def __init__(self) -> None:
+        # NOTE
+        #   Cities get dense ids in the order of registration. The registry
+        #   maps names to cities for the inputs, and ids to cities by `city`.
+        self._cities: list[City] = []
+        self._by_name: dict[str, City] = {}
+
+    def register(self, name: str) -> City:
+        if name in self._by_name:
+            raise ValueError(f"City '{name}' has already been registered.")
+
+        city = City(name)
+        city._id = len(self._cities)
+        self._cities.append(city)
+        self._by_name[name] = city
+        return city
+
+    def city(self, id: int) -> City:
+        return self._cities[id]
+
+    @property
+    def cities(self) -> tuple[City]:
+        return tuple(self._cities)
+
+    def __getitem__(self, name: str) -> City:
+        return self._by_name[name]
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._by_name)
+
+    def __len__(self) -> int:
+        return len(self._cities)
+
+
+class CityGraph:
+
+    def __init__(self, cities: t.Iterable[City]) -> None:
+        self._cities = tuple(cities)
+        index = {city: i for i, city in enumerate(self._cities)}
+
+        # Compressed adjacency of the initial visitables; neighbors of the
+        # i-th city are `_targets[_offsets[i]:_offsets[i + 1]]` in
+        # ascending order.
+        self._offsets = array("q", [0])
+        self._targets = array("q")
+        for city in self._cities:
+            if city._initial_visitables is None:
+                raise ValueError(
+                    f"Initial visitables of {city} have not been set yet."
+                )
+            self._targets.extend(
+                sorted(index[c] for c in city._initial_visitables)
+            )
+            self._offsets.append(len(self._targets))
+
+        # Reverse adjacency; connections to the i-th city are
+        # `_in_connections[_in_offsets[i]:_in_offsets[i + 1]]`.
+        self._sources = array("q")
+        in_degrees = [0] * len(self._cities)
+        for i in range(len(self._cities)):
+            for e in range(self._offsets[i], self._offsets[i + 1]):
+                self._sources.append(i)
+                in_degrees[self._targets[e]] += 1
+
+        self._in_offsets = array("q", [0])
+        for in_degree in in_degrees:
+            self._in_offsets.append(self._in_offsets[-1] + in_degree)
+        self._in_connections = array("q", [0]) * len(self._targets)
+        filled = array("q", self._in_offsets[:-1])
+        for e, j in enumerate(self._targets):
+            self._in_connections[filled[j]] = e
+            filled[j] += 1
+
+        # Lockdown masks for connections and cities.
+        self._enabled = bytearray(b"\x01") * len(self._targets)
+        self._locked = bytearray(len(self._cities))
+        offsets = self._offsets
+        self._num_visitables = array(
+            "q",
+            (end - begin for begin, end in zip(offsets, offsets[1:])),
+        )
+
+        # NOTE
+        #   The current visitables of each city are cached until one of its
+        #   connections is enabled or disabled.
+        self._current_visitables: list[t.Optional[tuple[City]]] = (
+            [None] * len(self._cities)
+        )
+
+        for i, city in enumerate(self._cities):
+            city._graph = self
+            city._index = i
+
+    @property
+    def cities(self) -> tuple[City]:
+        return self._cities
+
+    @property
+    def offsets(self) -> array:
+        return self._offsets
+
+    @property
+    def targets(self) -> array:
+        return self._targets
+
+    @property
+    def enabled(self) -> bytearray:
+        return self._enabled
+
+    @property
+    def locked(self) -> bytearray:
+        return self._locked
+
+    def current_visitables(self, i: int) -> tuple[City]:
+        visitables = self._current_visitables[i]
+        if visitables is None:
+            visitables = tuple(
+                self._cities[self._targets[e]]
+                for e in range(self._offsets[i], self._offsets[i + 1])
+                if self._enabled[e]
+            )
+            self._current_visitables[i] = visitables
+        return visitables
+
+    def num_visitables(self, i: int) -> int:
+        return self._num_visitables[i]
+
+    def nth_visitable(self, i: int, nth: int) -> City:
+        visitables = self.current_visitables(i)
+        if not (0 <= nth < len(visitables)):
+            raise IndexError("Visitable index out of range.")
+        return visitables[nth]
+
+    def in_lockdown(self, i: int) -> bool:
+        return bool(self._locked[i])
+
+    def lock(self, i: int) -> None:
+        self._locked[i] = 1
+
+        # NOTE
+        #   Connections from and to a city in lockdown are disabled.
+        for e in range(self._offsets[i], self._offsets[i + 1]):
+            self._set_enabled(e, False)
+        for k in range(self._in_offsets[i], self._in_offsets[i + 1]):
+            self._set_enabled(self._in_connections[k], False)
+
+    def unlock(self, i: int) -> None:
+        self._locked[i] = 0
+
+        # NOTE
+        #   Connections from and to the city are enabled again unless the
+        #   other side is still in lockdown.
+        for e in range(self._offsets[i], self._offsets[i + 1]):
+            self._set_enabled(e, not self._locked[self._targets[e]])
+        for k in range(self._in_offsets[i], self._in_offsets[i + 1]):
+            e = self._in_connections[k]
+            self._set_enabled(e, not self._locked[self._sources[e]])
+
+    def _set_enabled(self, e: int, enabled: bool) -> None:
+        if self._enabled[e] != enabled:
+            i = self._sources[e]
+            self._enabled[e] = enabled
+            self._num_visitables[i] += 1 if enabled else -1
+            self._current_visitables[i] = None
+
+    def reset_visitables(self, i: int) -> None:
+        for e in range(self._offsets[i], self._offsets[i + 1]):
+            self._enabled[e] = 1
+        self._num_visitables[i] = self._offsets[i + 1] - self._offsets[i]
+        self._current_visitables[i] = None
+
+    def enable(self, i: int, j: int) -> None:
+        e = self._find_connection(i, j)
+        if e is None:
+            raise ValueError(
+                f"{self._cities[j]} is not an initial visitable of "
+                f"{self._cities[i]}."
+            )
+        self._set_enabled(e, True)
+
+    def disable(self, i: int, j: int) -> None:
+        e = self._find_connection(i, j)
+        if e is not None:
+            self._set_enabled(e, False)
+
+    def _find_connection(self, i: int, j: int) -> t.Optional[int]:
+        end = self._offsets[i + 1]
+        e = bisect.bisect_left(self._targets, j, self._offsets[i], end)
+        if e < end and self._targets[e] == j:
+            return e
+        return None
 
 
 class CityGroup:
@@ -96,14 +301,6 @@ class CityGroup:
     def name(self) -> str:
         return self._name
 
-    def __eq__(self, name_city_group: CityGroup | str) -> bool:
-        if isinstance(name_city_group, CityGroup):
-            name_city_group = name_city_group.name
-        return self.name == name_city_group
-
-    def __hash__(self) -> int:
-        return hash(self._name)
-
     def __str__(self) -> str:
         return f"city group: {self._name}"
 
@@ -124,34 +321,40 @@ class CityGroup:
     def lockdown_regulation(self) -> float:
         return self._lockdown_regulation
 
+    @lockdown_regulation.setter
+    def lockdown_regulation(self, lockdown_regulation: float) -> None:
+        # NOTE
+        #   The lockdown is evaluated with the new regulation at the next
+        #   update of a world.
+        if not (0 <= lockdown_regulation <= 1):
+            raise ValueError("'lockdown_regulation' must be in range [0, 1].")
+        self._lockdown_regulation = lockdown_regulation
+
     @property
     def in_lockdown(self) -> bool:
         return self._in_lockdown
 
-    def lock(self, cities: list[City]) -> None:
+    def lock(self, cities: t.Optional[t.Iterable[City]] = None) -> None:
+        _warn_cities_deprecated(cities)
         self._in_lockdown = True
+        for city in self._cities:
+            city.lock()
 
-        for city in cities:
-            # Restricting locked -> unlocked.
-            if city in self._cities:
-                city.lock()
-            # Resricting unlocked -> locked.
-            else:
-                for city_lockdowned in self._cities:
-                    city.discard_visitable(city_lockdowned)
-
-    def unlock(self, cities: list[City]) -> None:
+    def unlock(self, cities: t.Optional[t.Iterable[City]] = None) -> None:
+        _warn_cities_deprecated(cities)
         self._in_lockdown = False
-
-        for city in cities:
-            # Enabling locked -> unlocked.
-            if city in self._cities:
-                city.unlock()
-            # Enabling unlocked -> locked.
-            else:
-                if city.in_lockdown:
-                    continue
-
-                for city_lockdowned in self._cities:
-                    if city_lockdowned in city._initial_visitables:
-                        city.add_visitable(city_lockdowned)
+        for city in self._cities:
+            city.unlock()
+
+
+def _warn_cities_deprecated(cities: t.Optional[t.Iterable[City]]) -> None:
+    # NOTE
+    #   The cities outside of a group used to be given to update their
+    #   connections to the group, which the graph of the cities does now.
+    if cities is not None:
+        warnings.warn(
+            "'cities' of 'CityGroup.lock' and 'CityGroup.unlock' is "
+            "deprecated and ignored.",
+            DeprecationWarning,
+            stacklevel=3,
+        )
@@ -0,0 +1,310 @@
+from __future__ import annotations
+import typing as t
+
+import numpy as np
+
+from .array_world import (
+    CODE_E,
+    CODE_I,
+    CODE_R,
+    CODE_S,
+    NO_REMAINING_STEPS,
+    NUM_STATES,
+    _ArrayCities,
+)
+from .city import (
+    City,
+    CityGroup,
+)
+from .person import (
+    Person,
+    PersonState,
+    PopulationDependentPerson,
+)
+from .rng import (
+    STREAM_INFECTION,
+    STREAM_MOVEMENT,
+    RandomStreams,
+)
+from .world import World
+
+
+class PersonClass(t.NamedTuple):
+
+    p_infection: float
+    p_staying: float
+    action_regulation: float
+    steps_for_onset: int
+    steps_for_recover: int
+    population_dependent: bool
+
+    @classmethod
+    def of(cls, person: Person) -> PersonClass:
+        return cls(
+            *person.cohort,
+            isinstance(person, PopulationDependentPerson),
+        )
+
+
+class CompartmentWorld(_ArrayCities):
+
+    def __init__(
+        self,
+        people: t.Sequence[Person],
+        cities: t.Sequence[City],
+        city_groups: t.Sequence[CityGroup],
+        seed: t.Optional[int | RandomStreams] = None,
+    ) -> None:
+        super().__init__(cities, city_groups, seed=seed)
+        self._setup_people(people)
+
+    def _setup_people(self, people: t.Sequence[Person]) -> None:
+        index = self._city_index
+
+        classes: dict[PersonClass, int] = {}
+        class_of_person = np.array(
+            [
+                classes.setdefault(PersonClass.of(person), len(classes))
+                for person in people
+            ],
+            dtype=np.int64,
+        )
+        self._classes = tuple(classes)
+
+        def class_array(field: str, dtype: type) -> np.ndarray:
+            return np.array(
+                [getattr(c, field) for c in self._classes],
+                dtype=dtype,
+            )
+
+        self._p_infection = class_array("p_infection", np.float64)
+        self._p_staying = class_array("p_staying", np.float64)
+        self._action_regulation = class_array("action_regulation", np.float64)
+        self._steps_for_onset = class_array("steps_for_onset", np.int64)
+        self._steps_for_recover = class_array("steps_for_recover", np.int64)
+        self._population_dependent = class_array(
+            "population_dependent",
+            bool,
+        )
+
+        # NOTE
+        #   People in E and I are binned by the step of their transition
+        #   like the timers of `World`; the bin of a transition due at step
+        #   `t` is `t % _num_onset_bins` (or `_num_recover_bins`), so only
+        #   the bins of the current step change state at each step.
+        onsets = [
+            person.remaining_steps_for_onset for person in people
+            if person.state is PersonState.E
+        ]
+        recovers = [
+            person.remaining_steps_for_recover for person in people
+            if person.state is PersonState.I
+        ]
+        self._num_onset_bins = max(
+            [*self._steps_for_onset.tolist(), *onsets, 1],
+        )
+        self._num_recover_bins = max(
+            [*self._steps_for_recover.tolist(), *recovers, 1],
+        )
+
+        # Bins: S, E (by the step of onset), I (by the step of recovery), R.
+        self._bin_onset = 1
+        self._bin_recover = self._bin_onset + self._num_onset_bins
+        self._bin_R = self._bin_recover + self._num_recover_bins
+        self._state_of_bin = np.repeat(
+            np.array([CODE_S, CODE_E, CODE_I, CODE_R], dtype=np.int8),
+            [1, self._num_onset_bins, self._num_recover_bins, 1],
+        )
+
+        bins = np.array(
+            [self._bin_of(person) for person in people],
+            dtype=np.int64,
+        )
+        positions = np.array(
+            [index[person.position] for person in people],
+            dtype=np.int64,
+        )
+        self._counts = np.zeros(
+            (len(self._classes), len(self._cities), self._bin_R + 1),
+            dtype=np.int64,
+        )
+        np.add.at(self._counts, (class_of_person, positions, bins), 1)
+
+    def _bin_of(self, person: Person) -> int:
+        # NOTE
+        #   Like `World._schedule`, a transition happens at the next step at
+        #   the earliest.
+        if person.state is PersonState.S:
+            return 0
+        if person.state is PersonState.E:
+            remaining_steps = person.remaining_steps_for_onset
+            due_step = self._step + max(remaining_steps, 1)
+            return self._bin_onset + due_step % self._num_onset_bins
+        if person.state is PersonState.I:
+            remaining_steps = person.remaining_steps_for_recover
+            due_step = self._step + max(remaining_steps, 1)
+            return self._bin_recover + due_step % self._num_recover_bins
+        return self._bin_R
+
+    @classmethod
+    def from_world(
+        cls,
+        world: World,
+        seed: t.Optional[int | RandomStreams] = None,
+    ) -> CompartmentWorld:
+        return cls(world.people, world.cities, world.city_groups, seed=seed)
+
+    @property
+    def classes(self) -> tuple[PersonClass]:
+        return self._classes
+
+    @property
+    def counts(self) -> np.ndarray:
+        # NOTE
+        #   The numbers of people by class, city and bin.
+        return self._counts
+
+    @property
+    def is_absorbing(self) -> bool:
+        return not np.any(self._counts[:, :, self._bin_onset:self._bin_R])
+
+    @property
+    def population(self) -> int:
+        return int(self._counts.sum())
+
+    def remaining_steps_of_bins(self) -> np.ndarray:
+        # NOTE
+        #   The remaining steps of onset for E and of recovery for I, and
+        #   `NO_REMAINING_STEPS` for the others, of each bin.
+        remaining_steps = np.full(self._bin_R + 1, NO_REMAINING_STEPS)
+        for begin, num_bins in (
+            (self._bin_onset, self._num_onset_bins),
+            (self._bin_recover, self._num_recover_bins),
+        ):
+            steps = (np.arange(num_bins) - self._step) % num_bins
+            steps[steps == 0] = num_bins
+            remaining_steps[begin:begin + num_bins] = steps
+        return remaining_steps
+
+    def state_of_bins(self) -> np.ndarray:
+        return self._state_of_bin
+
+    def count_people_in_cities(self) -> np.ndarray:
+        counts = self._counts.sum(axis=0)
+        result = np.zeros((len(self._cities), NUM_STATES), dtype=np.int64)
+        result[:, CODE_S] = counts[:, 0]
+        result[:, CODE_E] = counts[:, self._bin_onset:self._bin_recover].sum(1)
+        result[:, CODE_I] = counts[:, self._bin_recover:self._bin_R].sum(1)
+        result[:, CODE_R] = counts[:, self._bin_R]
+        return result
+
+    def count_people(self) -> np.ndarray:
+        return self.count_people_in_cities().sum(axis=0)
+
+    def update(self) -> None:
+        self._step += 1
+        self._update_positions()
+        self._update_states(self.count_people_in_cities())
+        self._lockdown(self.count_people_in_city_groups())
+
+    def update_movement(self) -> None:
+        if not self.is_absorbing:
+            raise ValueError(
+                "The movement-only update is only valid in absorbing states."
+            )
+
+        self._step += 1
+        self._update_positions()
+        self._lockdown(self.count_people_in_city_groups())
+
+    def _update_positions(self) -> None:
+        counts = self._counts
+        movable = counts * (self._num_visitables > 0)[None, :, None]
+        classes, cities, bins = np.nonzero(movable)
+        if classes.size == 0:
+            return
+
+        # NOTE
+        #   Same weights as `Person.update_position`, including the rescaling
+        #   for infected people. The staying and the visitable cities take
+        #   consecutive intervals of the cumulative weights like
+        #   `random.choices`, so an interval out of [0, total) is cut off.
+        num_others = self._num_visitables[cities]
+        p_staying = self._p_staying[classes]
+        weight_others = (1 - p_staying) / num_others
+        infected = self._state_of_bin[bins] == CODE_I
+        weight_others = np.where(
+            infected,
+            self._action_regulation[classes] * weight_others,
+            weight_others,
+        )
+        weight_staying = np.where(
+            infected,
+            1 - (num_others + 1) * weight_others,
+            p_staying,
+        )
+        total = weight_staying + num_others * weight_others
+
+        choices = np.arange(self._num_visitables.max() + 1)
+        uppers = np.where(
+            choices[None, :] <= num_others[:, None],
+            weight_staying[:, None] + weight_others[:, None] * choices,
+            total[:, None],
+        )
+        uppers = np.clip(uppers, 0., total[:, None])
+        pvals = np.diff(uppers, axis=1, prepend=0.)
+        pvals /= total[:, None]
+
+        rng = self._rng.generator(self._step, STREAM_MOVEMENT)
+        moves = rng.multinomial(counts[classes, cities, bins], pvals)
+
+        counts[classes, cities, bins] = moves[:, 0]
+        rows, nth = np.nonzero(moves[:, 1:])
+        destinations = self._current_targets[
+            self._current_offsets[cities[rows]] + nth
+        ]
+        np.add.at(
+            counts,
+            (classes[rows], destinations, bins[rows]),
+            moves[rows, nth + 1],
+        )
+
+    def _update_states(self, counts_in_cities: np.ndarray) -> None:
+        counts = self._counts
+        num_classes = len(self._classes)
+        num_infected = counts_in_cities[:, CODE_I]
+
+        # S -> E
+        classes, cities = np.nonzero(counts[:, :, 0] * (num_infected > 0))
+        p_infection = self._p_infection[classes]
+        p_infection = np.where(
+            self._population_dependent[classes],
+            1 - (1 - p_infection)**num_infected[cities],
+            p_infection,
+        )
+        rng = self._rng.generator(self._step, STREAM_INFECTION)
+        exposed_new = rng.binomial(counts[classes, cities, 0], p_infection)
+
+        # E -> I and I -> R of the bins due now.
+        bin_onset = self._bin_onset + self._step % self._num_onset_bins
+        bin_recover = self._bin_recover + self._step % self._num_recover_bins
+        infected_new = counts[:, :, bin_onset].copy()
+        recovered_new = counts[:, :, bin_recover].copy()
+        counts[:, :, bin_onset] = 0
+        counts[:, :, bin_recover] = 0
+
+        counts[:, :, self._bin_R] += recovered_new
+
+        every_class = np.arange(num_classes)
+        bins_recover = self._bin_recover + (
+            (self._step + np.maximum(self._steps_for_recover, 1))
+            % self._num_recover_bins
+        )
+        counts[every_class, :, bins_recover] += infected_new
+
+        bins_onset = self._bin_onset + (
+            (self._step + np.maximum(self._steps_for_onset, 1))
+            % self._num_onset_bins
+        )
+        counts[classes, cities, 0] -= exposed_new
+        counts[classes, cities, bins_onset[classes]] += exposed_new
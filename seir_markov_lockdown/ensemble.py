@@ -0,0 +1,203 @@
+from __future__ import annotations
+import copy
+import typing as t
+
+import numpy as np
+
+from .array_world import (
+    CODE_E,
+    CODE_I,
+    NUM_STATES,
+    ArrayWorld,
+    _PEOPLE_FIELDS,
+)
+from .city import (
+    City,
+    CityGroup,
+)
+from .rng import RandomStreams
+
+
+class _ReplicatedStreams:
+
+    def __init__(self, streams: list[RandomStreams], population: int) -> None:
+        self._streams = streams
+        self._population = population
+
+    def uniform(self, step: int, purpose: int, ids: np.ndarray) -> np.ndarray:
+        # NOTE
+        #   `ids` are of the replicated people in ascending order; each
+        #   replicate draws from its own streams with the original ids.
+        ids = np.asarray(ids, dtype=np.int64)
+        firsts = self._population * np.arange(len(self._streams) + 1)
+        bounds = np.searchsorted(ids, firsts)
+
+        result = np.empty(len(ids), dtype=np.float64)
+        for r, streams in enumerate(self._streams):
+            begin, end = bounds[r], bounds[r + 1]
+            if begin < end:
+                result[begin:end] = streams.uniform(
+                    step,
+                    purpose,
+                    ids[begin:end] - firsts[r],
+                )
+        return result
+
+
+class EnsembleWorld:
+
+    def __init__(
+        self,
+        world: ArrayWorld,
+        num_replicates: int,
+        seed: t.Optional[int | RandomStreams] = None,
+    ) -> None:
+        # NOTE
+        #   All replicates start from the current state of `world`, and the
+        #   r-th one evolves like `world` with `rng.substream(r)`. If `seed`
+        #   is None, the streams of `world` are used.
+        if num_replicates < 1:
+            raise ValueError("'num_replicates' must be positive.")
+
+        if seed is None:
+            self._rng = world.rng
+        elif isinstance(seed, RandomStreams):
+            self._rng = seed
+        else:
+            self._rng = RandomStreams(seed)
+
+        self._num_replicates = num_replicates
+        self._population = world.population
+        self._num_cities = len(world.cities)
+        self._num_city_groups = len(world.city_groups)
+        self._world = _replicate(world, num_replicates)
+        self._world._rng = _ReplicatedStreams(
+            self._rng.spawn(num_replicates),
+            self._population,
+        )
+
+    @property
+    def cities(self) -> tuple[City]:
+        return self._world.cities[:self._num_cities]
+
+    @property
+    def city_groups(self) -> tuple[CityGroup]:
+        return self._world.city_groups[:self._num_city_groups]
+
+    @property
+    def num_replicates(self) -> int:
+        return self._num_replicates
+
+    @property
+    def population(self) -> int:
+        return self._population
+
+    @property
+    def step(self) -> int:
+        return self._world.step
+
+    @property
+    def rng(self) -> RandomStreams:
+        return self._rng
+
+    @property
+    def absorbing(self) -> np.ndarray:
+        state = self.states
+        return ~np.any((state == CODE_E) | (state == CODE_I), axis=1)
+
+    @property
+    def is_absorbing(self) -> bool:
+        return self._world.is_absorbing
+
+    @property
+    def positions(self) -> np.ndarray:
+        # NOTE
+        #   The replicated cities are numbered after the replicate, so the
+        #   original indices are computed on every call.
+        return self._world.positions.reshape(self._shape) % self._num_cities
+
+    @property
+    def states(self) -> np.ndarray:
+        return self._world.states.reshape(self._shape)
+
+    @property
+    def remaining_steps_for_onset(self) -> np.ndarray:
+        return self._world.remaining_steps_for_onset.reshape(self._shape)
+
+    @property
+    def remaining_steps_for_recover(self) -> np.ndarray:
+        return self._world.remaining_steps_for_recover.reshape(self._shape)
+
+    @property
+    def in_lockdown(self) -> np.ndarray:
+        return self._world.in_lockdown.reshape(self._num_replicates, -1)
+
+    @property
+    def group_in_lockdown(self) -> np.ndarray:
+        return self._world.group_in_lockdown.reshape(self._num_replicates, -1)
+
+    @property
+    def _shape(self) -> tuple[int, int]:
+        return (self._num_replicates, self._population)
+
+    def city_index(self, city: City) -> int:
+        return self._world.city_index(city)
+
+    def count_people_in_cities(self) -> np.ndarray:
+        counts = self._world.count_people_in_cities()
+        return counts.reshape(self._num_replicates, -1, NUM_STATES)
+
+    def count_people_in_city_groups(self) -> np.ndarray:
+        counts = self._world.count_people_in_city_groups()
+        return counts.reshape(self._num_replicates, -1, NUM_STATES)
+
+    def count_people(self) -> np.ndarray:
+        replicates = np.repeat(
+            np.arange(self._num_replicates),
+            self._population,
+        )
+        counts = np.bincount(
+            replicates * NUM_STATES + self._world.states,
+            minlength=self._num_replicates * NUM_STATES,
+        )
+        return counts.reshape(self._num_replicates, NUM_STATES)
+
+    def update(self) -> None:
+        self._world.update()
+
+    def update_movement(self) -> None:
+        self._world.update_movement()
+
+
+def _replicate(world: ArrayWorld, num_replicates: int) -> ArrayWorld:
+    # NOTE
+    #   The replicates form one world of disjoint copies, in which the r-th
+    #   copy of a city, a city group or a person is numbered after the
+    #   (r - 1)-th ones. Nobody moves between copies and every copy decides
+    #   its own lockdown.
+    num_cities = len(world.cities)
+    num_city_groups = len(world.city_groups)
+
+    def tile(array: np.ndarray, offset: int = 0) -> np.ndarray:
+        if offset == 0:
+            return np.tile(array, num_replicates)
+        offsets = offset * np.arange(num_replicates, dtype=array.dtype)
+        return (offsets[:, None] + array).ravel()
+
+    replicated = copy.copy(world)
+    replicated._cities = world.cities * num_replicates
+    replicated._city_groups = world.city_groups * num_replicates
+    for name in _PEOPLE_FIELDS:
+        setattr(replicated, name, tile(getattr(world, name)))
+    replicated._position = tile(world._position, num_cities)
+
+    replicated._sources = tile(world._sources, num_cities)
+    replicated._targets = tile(world._targets, num_cities)
+    replicated._in_lockdown = tile(world._in_lockdown)
+    replicated._update_visitables()
+
+    replicated._member_groups = tile(world._member_groups, num_city_groups)
+    replicated._member_cities = tile(world._member_cities, num_cities)
+    replicated._lockdown_regulation = tile(world._lockdown_regulation)
+    replicated._group_in_lockdown = tile(world._group_in_lockdown)
+    return replicated
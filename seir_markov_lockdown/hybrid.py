@@ -0,0 +1,172 @@
+from __future__ import annotations
+import typing as t
+
+import numpy as np
+
+from .array_world import (
+    CODE_E,
+    CODE_I,
+    NUM_STATES,
+    STATE_CODES,
+)
+from .city import (
+    City,
+    CityGroup,
+)
+from .compartment import CompartmentWorld
+from .person import (
+    Person,
+    PersonState,
+)
+from .rng import (
+    STREAM_INFECTION,
+    STREAM_MOVEMENT,
+    RandomStreams,
+)
+from .world import World
+
+
+class HybridWorld(CompartmentWorld):
+
+    def __init__(
+        self,
+        tracked: t.Sequence[Person],
+        background: t.Sequence[Person],
+        cities: t.Sequence[City],
+        city_groups: t.Sequence[CityGroup],
+        seed: t.Optional[int | RandomStreams] = None,
+    ) -> None:
+        # NOTE
+        #   `tracked` people are simulated one by one as they are and taken
+        #   over by this world, while `background` people are only counted
+        #   like `CompartmentWorld`. Both are in the same counts of cities,
+        #   so they infect each other and decide the lockdown together.
+        super().__init__(background, cities, city_groups, seed=seed)
+        self._setup_tracked(tracked)
+
+    def _setup_tracked(self, tracked: t.Sequence[Person]) -> None:
+        self._tracked = tuple(tracked)
+        self._tracked_counts = np.zeros(
+            (len(self._cities), NUM_STATES),
+            dtype=np.int64,
+        )
+        for person in self._tracked:
+            remaining_steps_for_onset = person.remaining_steps_for_onset
+            remaining_steps_for_recover = person.remaining_steps_for_recover
+            person._remaining_steps_for_onset = remaining_steps_for_onset
+            person._remaining_steps_for_recover = remaining_steps_for_recover
+            person._due_step = None
+            person._world = self
+
+            i = self._city_index[person.position]
+            self._tracked_counts[i, STATE_CODES[person.state]] += 1
+
+    @classmethod
+    def from_world(
+        cls,
+        world: World,
+        is_tracked: t.Callable[[Person], bool],
+        seed: t.Optional[int | RandomStreams] = None,
+    ) -> HybridWorld:
+        tracked = [person for person in world.people if is_tracked(person)]
+        background = [
+            person for person in world.people if not is_tracked(person)
+        ]
+        return cls(
+            tracked,
+            background,
+            world.cities,
+            world.city_groups,
+            seed=seed,
+        )
+
+    @property
+    def tracked(self) -> tuple[Person]:
+        return self._tracked
+
+    @property
+    def is_absorbing(self) -> bool:
+        if np.any(self._tracked_counts[:, [CODE_E, CODE_I]]):
+            return False
+        return super().is_absorbing
+
+    @property
+    def population(self) -> int:
+        return super().population + len(self._tracked)
+
+    def count_people_in_cities(self) -> np.ndarray:
+        return super().count_people_in_cities() + self._tracked_counts
+
+    def count_tracked_people_in_cities(self) -> np.ndarray:
+        return self._tracked_counts.copy()
+
+    def _update_positions(self) -> None:
+        super()._update_positions()
+
+        # NOTE
+        #   Same as `Person.update_position` on the current visitables of
+        #   this world, with a uniform of each tracked person.
+        uniforms = self._rng.uniform(
+            self._step,
+            STREAM_MOVEMENT,
+            np.arange(len(self._tracked)),
+        )
+        for person, u in zip(self._tracked, uniforms.tolist()):
+            i = self._city_index[person.position]
+            num_others = int(self._num_visitables[i])
+            if num_others == 0:
+                continue
+
+            p_staying, weight_others = person.movement_weights(num_others)
+            x = u * (p_staying + num_others * weight_others)
+            if x < p_staying or weight_others <= 0:
+                continue
+
+            nth = min(int((x - p_staying) / weight_others), num_others - 1)
+            j = self._current_targets[self._current_offsets[i] + nth]
+            person._move(self._cities[j])
+
+    def _update_states(self, counts_in_cities: np.ndarray) -> None:
+        super()._update_states(counts_in_cities)
+
+        uniforms = self._rng.uniform(
+            self._step,
+            STREAM_INFECTION,
+            np.arange(len(self._tracked)),
+        )
+        evaluated: list[Person] = []
+        for person, u in zip(self._tracked, uniforms.tolist()):
+            if person.state is PersonState.S:
+                i = self._city_index[person.position]
+                num_infected = int(counts_in_cities[i, CODE_I])
+                if u < person.infection_probability(num_infected):
+                    person._infect()
+                    evaluated.append(person)
+            elif person.state is not PersonState.R:
+                # NOTE
+                #   The countdowns of E and I do not depend on the counts.
+                person.eval_next_state({})
+                evaluated.append(person)
+
+        for person in evaluated:
+            person.update_state()
+
+    def _move_person(
+        self,
+        person: Person,
+        city_from: City,
+        city_to: City,
+    ) -> None:
+        code = STATE_CODES[person.state]
+        self._tracked_counts[self._city_index[city_from], code] -= 1
+        self._tracked_counts[self._city_index[city_to], code] += 1
+
+    def _change_person_state(
+        self,
+        person: Person,
+        state_from: PersonState,
+        state_to: PersonState,
+    ) -> None:
+        i = self._city_index[person.position]
+        self._tracked_counts[i, STATE_CODES[state_from]] -= 1
+        self._tracked_counts[i, STATE_CODES[state_to]] += 1
@@ -4,6 +4,13 @@ import random
 import typing as t
 
 from .city import City
+from .rng import (
+    STREAM_INFECTION,
+    STREAM_MOVEMENT,
+)
+
+if t.TYPE_CHECKING:
+    from .world import World
 
 
 class PersonState(enum.Enum):
@@ -16,9 +23,61 @@ class PersonState(enum.Enum):
 
 CountsPeople_t = dict[PersonState, int]
 
+# NOTE
+#   The codes of the states in the arrays of people.
+STATE_CODES: dict[PersonState, int] = {
+    PersonState.S: 0,
+    PersonState.E: 1,
+    PersonState.I: 2,
+    PersonState.R: 3,
+}
+STATES: tuple[PersonState, ...] = tuple(STATE_CODES.keys())
+NUM_STATES = len(STATES)
+
+CODE_S = STATE_CODES[PersonState.S]
+CODE_E = STATE_CODES[PersonState.E]
+CODE_I = STATE_CODES[PersonState.I]
+CODE_R = STATE_CODES[PersonState.R]
+
+# NOTE
+#   Stands for `None` of `Person.remaining_steps_for_*` in the arrays.
+NO_REMAINING_STEPS = -1
+
+
+class PersonCohort(t.NamedTuple):
+
+    # NOTE
+    #   The parameters of a person that never change during a run; people
+    #   with the same parameters may share one cohort.
+    p_infection: float
+    p_staying: float
+    action_regulation: float
+    steps_for_onset: int
+    steps_for_recover: int
+
+    def validate(self) -> PersonCohort:
+        if not (0 <= self.p_infection <= 1):
+            raise ValueError("'p_infection' must be in range [0, 1].")
+        if not (0 <= self.p_staying <= 1):
+            raise ValueError("'p_staying' must be in range [0, 1].")
+        if not (0 <= self.action_regulation <= 1):
+            raise ValueError("'action_regulation' must be in range [0, 1].")
+        return self
+
 
 class Person:
 
+    __slots__ = (
+        "_position",
+        "_state",
+        "_cohort",
+        "_next_state",
+        "_remaining_steps_for_onset",
+        "_remaining_steps_for_recover",
+        "_world",
+        "_due_step",
+    )
+
     def __init__(
         self,
         position: City,
@@ -29,75 +88,166 @@ class Person:
         steps_for_onset: int,
         steps_for_recover: int,
     ) -> None:
-        if not (0 <= p_infection <= 1):
-            raise ValueError("'p_infection' must be in range [0, 1].")
-        if not (0 <= p_staying <= 1):
-            raise ValueError("'p_staying' must be in range [0, 1].")
-        if not (0 <= action_regulation <= 1):
-            raise ValueError("'action_regulation' must be in range [0, 1].")
+        cohort = PersonCohort(
+            p_infection,
+            p_staying,
+            action_regulation,
+            steps_for_onset,
+            steps_for_recover,
+        )
+        self._setup(position, state, cohort.validate())
+
+    @classmethod
+    def of_cohort(
+        cls,
+        position: City,
+        state: PersonState,
+        cohort: PersonCohort,
+    ) -> Person:
+        # NOTE
+        #   `cohort` is shared as it is, so it must have been validated.
+        person = cls.__new__(cls)
+        person._setup(position, state, cohort)
+        return person
 
+    def _setup(
+        self,
+        position: City,
+        state: PersonState,
+        cohort: PersonCohort,
+    ) -> None:
         self._position = position
         self._state = state
-        self._p_infection = p_infection
-        self._p_staying = p_staying
-        self._action_regulation = action_regulation
-        self._steps_for_onset = steps_for_onset
-        self._steps_for_recover = steps_for_recover
+        self._cohort = cohort
 
         self._next_state: t.Optional[PersonState] = None
         self._remaining_steps_for_onset: t.Optional[int] = None
         self._remaining_steps_for_recover: t.Optional[int] = None
+        self._world: t.Optional[World] = None
+        self._due_step: t.Optional[int] = None
 
         if self._state == PersonState.E:
-            self._remaining_steps_for_onset = self._steps_for_onset
+            self._remaining_steps_for_onset = cohort.steps_for_onset
         elif self.state == PersonState.I:
-            self._remaining_steps_for_recover = self._steps_for_recover
+            self._remaining_steps_for_recover = cohort.steps_for_recover
 
     @property
     def position(self) -> City:
         return self._position
 
-    def update_position(self) -> Person:
-        next_cities = [self.position]
-        next_cities.extend(self.position.current_visitables)
-        num_next = len(next_cities)
+    def update_position(self, u: t.Optional[float] = None) -> Person:
+        # NOTE
+        #   `u` is a uniform in [0, 1) for this person. If it is not given,
+        #   it is drawn as in `_draw`.
+        if u is None:
+            u = self._draw(STREAM_MOVEMENT)
+
+        num_others = self.position.num_visitables
+        if num_others == 0:
+            return self
 
         # NOTE
-        #   `num_next` includes the current city itself.
-        if num_next == 1:
+        #   Same as `random.choices` with the weights of staying and the
+        #   others, but without building the candidates and the weights.
+        p_staying, weight_others = self.movement_weights(num_others)
+        total = p_staying + num_others * weight_others
+        x = u * total
+        if x < p_staying or weight_others <= 0:
             return self
 
-        p_staying = self._p_staying
-        weight_others = (1 - self._p_staying) / (num_next - 1)
-        if self.state == PersonState.I:
-            weight_others = self._action_regulation * weight_others
-            p_staying = 1 - num_next * weight_others
+        nth = min(int((x - p_staying) / weight_others), num_others - 1)
+        self._move(self.position.nth_visitable(nth))
+        return self
 
-        weights = [p_staying]
-        weights.extend([weight_others for _ in range(num_next - 1)])
+    def _draw(self, purpose: int) -> float:
+        # NOTE
+        #   A person in a world draws from the random streams of the world,
+        #   so the draw is reproducible from its seed. A person without a
+        #   world falls back to the `random` module, which is not.
+        if self._world is None:
+            return random.random()
+        return self._world._uniform(self, purpose)
+
+    def movement_weights(self, num_others: int) -> tuple[float, float]:
+        # NOTE
+        #   Returns the (unnormalized) weights of staying and of moving to
+        #   each of `num_others` visitable cities.
+        p_staying = self._cohort.p_staying
+        weight_others = (1 - p_staying) / num_others
+        if self.state == PersonState.I:
+            weight_others = self._cohort.action_regulation * weight_others
+            p_staying = 1 - (num_others + 1) * weight_others
+        return p_staying, weight_others
 
-        next_city = random.choices(next_cities, weights=weights)[0]
-        self._position = next_city
-        return self
+    def _move(self, city: City) -> None:
+        if self._world is not None:
+            self._world._move_person(self, self._position, city)
+        self._position = city
 
     @property
     def state(self) -> PersonState:
         return self._state
 
+    @property
+    def cohort(self) -> PersonCohort:
+        return self._cohort
+
+    @property
+    def p_infection(self) -> float:
+        return self._cohort.p_infection
+
+    @property
+    def p_staying(self) -> float:
+        return self._cohort.p_staying
+
+    @property
+    def action_regulation(self) -> float:
+        return self._cohort.action_regulation
+
+    @property
+    def steps_for_onset(self) -> int:
+        return self._cohort.steps_for_onset
+
+    @property
+    def steps_for_recover(self) -> int:
+        return self._cohort.steps_for_recover
+
     @property
     def remaining_steps_for_onset(self) -> t.Optional[int]:
-        return self._remaining_steps_for_onset
+        if self._remaining_steps_for_onset is None:
+            return None
+        return self._remaining_steps(self._remaining_steps_for_onset)
 
     @property
     def remaining_steps_for_recover(self) -> t.Optional[int]:
-        return self._remaining_steps_for_recover
-
-    def eval_next_state(self, counts: CountsPeople_t) -> Person:
-        # Taking self counting into account.
-        counts[self.state] -= 1
+        if self._remaining_steps_for_recover is None:
+            return None
+        return self._remaining_steps(self._remaining_steps_for_recover)
 
+    def _remaining_steps(self, remaining_steps: int) -> int:
+        # NOTE
+        #   A world schedules the transition at `_due_step` instead of
+        #   counting down every step, so the stored counter is only up to
+        #   date for a person without a schedule.
+        if self._due_step is None or self._world is None:
+            return remaining_steps
+        return self._due_step - self._world.step
+
+    def eval_next_state(
+        self,
+        counts: CountsPeople_t,
+        u: t.Optional[float] = None,
+    ) -> Person:
+        # NOTE
+        #   `counts` includes this person itself and must not be modified
+        #   because it is shared by everyone in the same city. Only the
+        #   number of infected people matters, which never counts a
+        #   susceptible person itself. `u` is a uniform in [0, 1) like that
+        #   of `update_position`, only used by a susceptible person.
         if self.state is PersonState.S:
-            self._eval_next_state_when_S(counts)
+            if u is None:
+                u = self._draw(STREAM_INFECTION)
+            self._eval_next_state_when_S(counts, u)
         elif self.state is PersonState.E:
             self._eval_next_state_when_E(counts)
         elif self.state is PersonState.I:
@@ -107,34 +257,53 @@ class Person:
 
         return self
 
-    def _eval_next_state_when_S(self, counts_others: CountsPeople_t) -> None:
-        if counts_others[PersonState.I] > 0:
-            possible_states = (PersonState.S, PersonState.E)
-            weights = (1 - self._p_infection, self._p_infection)
-            self._next_state = random.choices(possible_states, weights)[0]
+    def _eval_next_state_when_S(
+        self,
+        counts_others: CountsPeople_t,
+        u: float,
+    ) -> None:
+        p_infection = self.infection_probability(counts_others[PersonState.I])
+        if u < p_infection:
+            self._infect()
+            return
 
-            if self._next_state is PersonState.E:
-                self._remaining_steps_for_onset = self._steps_for_onset
-        else:
-            self._next_state = PersonState.S
+        self._next_state = PersonState.S
+
+    def infection_probability(self, num_infected: int) -> float:
+        if num_infected > 0:
+            return self._cohort.p_infection
+        return 0.
+
+    def _infect(self) -> None:
+        self._next_state = PersonState.E
+        self._remaining_steps_for_onset = self._cohort.steps_for_onset
+        self._due_step = None
 
     def _eval_next_state_when_E(self, counts_others: CountsPeople_t) -> None:
         self._remaining_steps_for_onset -= 1
         if self._remaining_steps_for_onset <= 0:
-            self._next_state = PersonState.I
-            self._remaining_steps_for_onset = None
-            self._remaining_steps_for_recover = self._steps_for_recover
+            self._onset()
         else:
             self._next_state = PersonState.E
 
     def _eval_next_state_when_I(self, counts_others: CountsPeople_t) -> None:
         self._remaining_steps_for_recover -= 1
         if self._remaining_steps_for_recover <= 0:
-            self._next_state = PersonState.R
-            self._remaining_steps_for_recover = None
+            self._recover()
         else:
             self._next_state = PersonState.I
 
+    def _onset(self) -> None:
+        self._next_state = PersonState.I
+        self._remaining_steps_for_onset = None
+        self._remaining_steps_for_recover = self._cohort.steps_for_recover
+        self._due_step = None
+
+    def _recover(self) -> None:
+        self._next_state = PersonState.R
+        self._remaining_steps_for_recover = None
+        self._due_step = None
+
     def _eval_next_state_when_R(self, counts_others: CountsPeople_t) -> None:
         self._next_state = PersonState.R
 
@@ -142,6 +311,13 @@ class Person:
         if self._next_state is None:
             raise ValueError("The next state has not been evaluated yet.")
 
+        if self._next_state is not self._state and self._world is not None:
+            self._world._change_person_state(
+                self,
+                self._state,
+                self._next_state,
+            )
+
         self._state = self._next_state
         self._next_state = None
         return self
@@ -149,9 +325,7 @@ class Person:
 
 class PopulationDependentPerson(Person):
 
-    def _eval_next_state_when_S(self, counts_others: CountsPeople_t) -> None:
-        num_infected = counts_others[PersonState.I]
-        possible_states = (PersonState.S, PersonState.E)
-        weight_for_S = (1 - self._p_infection)**num_infected
-        weights = (weight_for_S, 1 - weight_for_S)
-        self._next_state = random.choices(possible_states, weights)[0]
+    __slots__ = ()
+
+    def infection_probability(self, num_infected: int) -> float:
+        return 1 - (1 - self._cohort.p_infection)**num_infected
@@ -0,0 +1,80 @@
+from __future__ import annotations
+import typing as t
+
+import numpy as np
+
+
+# Purposes of random numbers drawn at each step.
+STREAM_MOVEMENT = 0
+STREAM_INFECTION = 1
+
+_MASK_64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+class RandomStreams:
+
+    def __init__(
+        self,
+        seed: t.Optional[int] = None,
+        key: tuple[int, ...] = (),
+    ) -> None:
+        seed_seq = np.random.SeedSequence(seed, spawn_key=key)
+        self._seed: int = seed_seq.entropy
+        self._key = tuple(key)
+
+        state = seed_seq.generate_state(3, np.uint64)
+        self._philox_key = state[:2]
+        self._base = int(state[2])
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @property
+    def key(self) -> tuple[int, ...]:
+        return self._key
+
+    def substream(self, *key: int) -> RandomStreams:
+        return RandomStreams(self._seed, self._key + key)
+
+    def spawn(self, n: int) -> list[RandomStreams]:
+        return [self.substream(i) for i in range(n)]
+
+    def generator(self, *counter: int) -> np.random.Generator:
+        # NOTE
+        #   Philox is counter-based; the lowest word of the counter is used
+        #   up by the draws and the others identify the stream, e.g.
+        #   (step, purpose, city).
+        if len(counter) > 3:
+            raise ValueError("At most 3 counter values are allowed.")
+
+        words = [0, *counter] + [0] * (3 - len(counter))
+        bit_generator = np.random.Philox(key=self._philox_key, counter=words)
+        return np.random.Generator(bit_generator)
+
+    def uniform(self, step: int, purpose: int, ids: np.ndarray) -> np.ndarray:
+        # NOTE
+        #   Counter-based uniforms in [0, 1): the value for an id only
+        #   depends on (seed, key, step, purpose, id), so any subset of ids
+        #   drawn in any order or process gets the same numbers.
+        base = _mix64(
+            _mix64(self._base ^ ((step * _GOLDEN_GAMMA) & _MASK_64))
+            ^ purpose
+        )
+        x = np.asarray(ids, dtype=np.uint64) * np.uint64(_GOLDEN_GAMMA)
+        x += np.uint64(base)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+        return (x >> np.uint64(11)).astype(np.float64) * 2.**-53
+
+
+def _mix64(x: int) -> int:
+    # SplitMix64 finalizer on Python integers.
+    x = (x + _GOLDEN_GAMMA) & _MASK_64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return x ^ (x >> 31)
@@ -0,0 +1,370 @@
+from __future__ import annotations
+import copy
+import multiprocessing as mp
+import os
+import typing as t
+
+import numpy as np
+
+from .array_world import (
+    NUM_STATES,
+    ArrayWorld,
+    _PEOPLE_FIELDS,
+)
+from .city import (
+    City,
+    CityGroup,
+)
+
+
+_COMMAND_UPDATE = 0
+_COMMAND_UPDATE_MOVEMENT = 1
+_COMMAND_STOP = 2
+
+_INTERVAL_CHECK_WORKERS = 1.    # s
+
+
+def partition_cities(populations: np.ndarray, num_shards: int) -> np.ndarray:
+    # NOTE
+    #   Assigns the most populated remaining city to the least loaded shard
+    #   and returns the shard of each city.
+    shard_of_city = np.zeros(len(populations), dtype=np.int64)
+    loads = np.zeros(num_shards, dtype=np.int64)
+    for i in np.argsort(-np.asarray(populations), kind="stable"):
+        shard = int(np.argmin(loads))
+        shard_of_city[i] = shard
+        loads[shard] += populations[i]
+    return shard_of_city
+
+
+class _SharedArray(t.NamedTuple):
+
+    raw: t.Any
+    dtype: str
+    shape: tuple[int, ...]
+
+    @classmethod
+    def allocate(
+        cls,
+        context: t.Any,
+        dtype: t.Any,
+        shape: tuple[int, ...],
+    ) -> _SharedArray:
+        dtype = np.dtype(dtype)
+        nbytes = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        raw = context.RawArray("b", nbytes)
+        return cls(raw, dtype.str, shape)
+
+    def view(self) -> np.ndarray:
+        count = int(np.prod(self.shape))
+        array = np.frombuffer(self.raw, dtype=self.dtype, count=count)
+        return array.reshape(self.shape)
+
+
+class _ShardSpec(t.NamedTuple):
+
+    shard: int
+    world: ArrayWorld
+    fields: dict[str, _SharedArray]
+    shard_of_city: np.ndarray
+    control: _SharedArray
+    exchange: _SharedArray
+    exchange_counts: _SharedArray
+    group_counts: _SharedArray
+    in_lockdown: _SharedArray
+    group_in_lockdown: _SharedArray
+    started: t.Any
+    finished: t.Any
+    barrier: t.Any
+
+
+class ShardedWorld:
+
+    def __init__(
+        self,
+        world: ArrayWorld,
+        num_shards: t.Optional[int] = None,
+        shard_of_city: t.Optional[t.Sequence[int]] = None,
+        mp_context: t.Optional[str] = None,
+    ) -> None:
+        # NOTE
+        #   `world` is taken over; its arrays of people and lockdown are moved
+        #   to shared memory so it always shows the current state after
+        #   `update`, but it must not be updated by itself anymore.
+        if num_shards is None:
+            num_shards = os.cpu_count() or 1
+        if num_shards < 1:
+            raise ValueError("'num_shards' must be positive.")
+
+        num_cities = len(world.cities)
+        if shard_of_city is None:
+            populations = np.bincount(world.positions, minlength=num_cities)
+            shard_of_city = partition_cities(populations, num_shards)
+        shard_of_city = np.asarray(shard_of_city, dtype=np.int64)
+        if shard_of_city.shape != (num_cities,):
+            raise ValueError("A shard must be given for each city.")
+        if np.any((shard_of_city < 0) | (shard_of_city >= num_shards)):
+            raise ValueError("Shards must be in range [0, 'num_shards').")
+
+        self._world = world
+        self._num_shards = num_shards
+        self._shard_of_city = shard_of_city
+        context = mp.get_context(mp_context)
+
+        def share(array: np.ndarray) -> _SharedArray:
+            shared = _SharedArray.allocate(context, array.dtype, array.shape)
+            shared.view()[...] = array
+            return shared
+
+        fields = {name: share(getattr(world, name)) for name in _PEOPLE_FIELDS}
+        in_lockdown = share(world._in_lockdown)
+        group_in_lockdown = share(world._group_in_lockdown)
+
+        # NOTE
+        #   Workers get a copy of `world` without the arrays of people, which
+        #   are attached from the shared memory instead. They only need the
+        #   numbers of cities and groups, so names stand for them.
+        template = copy.copy(world)
+        template._cities = tuple(city.name for city in world.cities)
+        template._city_groups = tuple(
+            city_group.name for city_group in world.city_groups
+        )
+        template._city_index = {}
+        for name in _PEOPLE_FIELDS:
+            setattr(template, name, None)
+
+        for name, shared in fields.items():
+            setattr(world, name, shared.view())
+        world._in_lockdown = in_lockdown.view()
+        world._group_in_lockdown = group_in_lockdown.view()
+
+        num_groups = len(world.city_groups)
+        self._control = _SharedArray.allocate(context, np.int64, (1,))
+        self._started = context.Semaphore(0)
+        self._finished = context.Semaphore(0)
+        barrier = context.Barrier(num_shards)
+        exchange = _SharedArray.allocate(
+            context,
+            np.int64,
+            (world.population,),
+        )
+        exchange_counts = _SharedArray.allocate(
+            context,
+            np.int64,
+            (num_shards, num_shards),
+        )
+        group_counts = _SharedArray.allocate(
+            context,
+            np.int64,
+            (num_shards, num_groups, NUM_STATES),
+        )
+
+        # NOTE
+        #   The specs keep the shared memory and the barrier alive as long as
+        #   the workers may use them.
+        self._specs: list[_ShardSpec] = []
+        self._workers: list[mp.process.BaseProcess] = []
+        for shard in range(num_shards):
+            spec = _ShardSpec(
+                shard,
+                template,
+                fields,
+                shard_of_city,
+                self._control,
+                exchange,
+                exchange_counts,
+                group_counts,
+                in_lockdown,
+                group_in_lockdown,
+                self._started,
+                self._finished,
+                barrier,
+            )
+            self._specs.append(spec)
+            worker = context.Process(
+                target=_run_shard,
+                args=(spec,),
+                daemon=True,
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    @property
+    def world(self) -> ArrayWorld:
+        return self._world
+
+    @property
+    def cities(self) -> tuple[City]:
+        return self._world.cities
+
+    @property
+    def city_groups(self) -> tuple[CityGroup]:
+        return self._world.city_groups
+
+    @property
+    def num_shards(self) -> int:
+        return self._num_shards
+
+    @property
+    def shard_of_city(self) -> np.ndarray:
+        return self._shard_of_city
+
+    @property
+    def step(self) -> int:
+        return self._world.step
+
+    @property
+    def is_absorbing(self) -> bool:
+        return self._world.is_absorbing
+
+    def count_people(self) -> np.ndarray:
+        return self._world.count_people()
+
+    def update(self) -> None:
+        self._run(_COMMAND_UPDATE)
+
+    def update_movement(self) -> None:
+        if not self._world.is_absorbing:
+            raise ValueError(
+                "The movement-only update is only valid in absorbing states."
+            )
+
+        self._run(_COMMAND_UPDATE_MOVEMENT)
+
+    def _run(self, command: int) -> None:
+        if not self._workers:
+            raise ValueError("The sharded world has already been closed.")
+
+        world = self._world
+        in_lockdown = world._in_lockdown.copy()
+        self._control.view()[0] = command
+        for _ in self._workers:
+            self._started.release()
+        for _ in self._workers:
+            self._wait_finished()
+
+        world._step += 1
+        if not np.array_equal(in_lockdown, world._in_lockdown):
+            world._update_visitables()
+
+    def close(self) -> None:
+        if not self._workers:
+            return
+
+        self._control.view()[0] = _COMMAND_STOP
+        for _ in self._workers:
+            self._started.release()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def _wait_finished(self) -> None:
+        # NOTE
+        #   A dead worker never finishes the step, so the workers are checked
+        #   while waiting.
+        while not self._finished.acquire(timeout=_INTERVAL_CHECK_WORKERS):
+            if not all(worker.is_alive() for worker in self._workers):
+                self._terminate()
+                raise RuntimeError("A shard worker failed.")
+
+    def _terminate(self) -> None:
+        for worker in self._workers:
+            worker.terminate()
+            worker.join()
+        self._workers = []
+
+    def __enter__(self) -> ShardedWorld:
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+
+def _run_shard(spec: _ShardSpec) -> None:
+    try:
+        _run_shard_steps(spec)
+    except BaseException:
+        spec.barrier.abort()
+        raise
+
+
+def _run_shard_steps(spec: _ShardSpec) -> None:
+    world = spec.world
+    for name, shared in spec.fields.items():
+        setattr(world, name, shared.view())
+
+    me = spec.shard
+    shard_of_city = spec.shard_of_city
+    num_shards = spec.exchange_counts.shape[0]
+    control = spec.control.view()
+    exchange = spec.exchange.view()
+    exchange_counts = spec.exchange_counts.view()
+    group_counts = spec.group_counts.view()
+
+    # NOTE
+    #   A shard owns the people in its cities and only writes their entries
+    #   of the shared arrays. The lockdown is decided by every shard from
+    #   the same reduced counts, and only the first one publishes it.
+    people = np.flatnonzero(shard_of_city[world._position] == me)
+    spec.barrier.wait()
+    while True:
+        spec.started.acquire()
+        command = int(control[0])
+        if command == _COMMAND_STOP:
+            return
+        world._step += 1
+
+        # Movement, and the people leaving for the other shards.
+        world._update_positions(people)
+        destinations = shard_of_city[world._position[people]]
+        leaving = destinations != me
+        order = np.argsort(destinations[leaving], kind="stable")
+        leavers = people[leaving][order]
+        people = people[~leaving]
+        exchange_counts[me] = np.bincount(
+            destinations[leaving],
+            minlength=num_shards,
+        )
+        spec.barrier.wait()
+
+        # NOTE
+        #   The exchange buffer is laid out by destination, then by source.
+        bounds = np.zeros(num_shards * num_shards + 1, dtype=np.int64)
+        np.cumsum(exchange_counts.T.ravel(), out=bounds[1:])
+        begin = 0
+        for shard in range(num_shards):
+            num_leavers = int(exchange_counts[me, shard])
+            if num_leavers > 0:
+                offset = bounds[shard * num_shards + me]
+                exchange[offset:offset + num_leavers] = (
+                    leavers[begin:begin + num_leavers]
+                )
+                begin += num_leavers
+        spec.barrier.wait()
+
+        begin = bounds[me * num_shards]
+        end = bounds[(me + 1) * num_shards]
+        people = np.concatenate((people, exchange[begin:end]))
+
+        # States, and the counts of this shard for the lockdown.
+        if command == _COMMAND_UPDATE:
+            world._update_states(_count_people(world, people), people)
+        group_counts[me] = world.count_people_in_city_groups(
+            _count_people(world, people),
+        )
+        spec.barrier.wait()
+
+        world._lockdown(group_counts.sum(axis=0))
+        if me == 0:
+            spec.in_lockdown.view()[:] = world._in_lockdown
+            spec.group_in_lockdown.view()[:] = world._group_in_lockdown
+        spec.finished.release()
+
+
+def _count_people(world: ArrayWorld, people: np.ndarray) -> np.ndarray:
+    num_cities = len(world.cities)
+    counts = np.bincount(
+        world._position[people] * NUM_STATES + world._state[people],
+        minlength=num_cities * NUM_STATES,
+    )
+    return counts.reshape(num_cities, NUM_STATES)
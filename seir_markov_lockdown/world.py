@@ -1,12 +1,30 @@
+import itertools
+import math
+import typing as t
+
+import numpy as np
+
 from .city import (
     City,
+    CityGraph,
     CityGroup,
 )
 from .person import (
+    CODE_E,
+    CODE_I,
+    CODE_S,
+    NO_REMAINING_STEPS,
+    NUM_STATES,
+    STATES,
     CountsPeople_t,
     Person,
     PersonState,
 )
+from .rng import (
+    STREAM_INFECTION,
+    STREAM_MOVEMENT,
+    RandomStreams,
+)
 
 
 class World:
@@ -16,10 +34,37 @@ class World:
         people: list[Person],
         cities: list[City],
         city_groups: list[CityGroup],
+        seed: t.Optional[int | RandomStreams] = None,
     ) -> None:
+        if any(city.graph is None for city in cities):
+            CityGraph(cities)
+
+        # NOTE
+        #   Cities are kept in the order of the graph so that the draws from
+        #   the per-city random streams do not depend on the given order.
         self._people = people
-        self._cities = cities
+        self._cities = sorted(cities, key=lambda city: city._index)
         self._city_groups = city_groups
+        if isinstance(seed, RandomStreams):
+            self._rng = seed
+        else:
+            self._rng = RandomStreams(seed)
+
+        self._people_in_city: dict[City, dict[Person, None]] = {}
+        self._susceptible_in_city: dict[City, dict[Person, None]] = {}
+        self._infectious_cities: dict[City, None] = {}
+        self._counts_in_city: dict[City, CountsPeople_t] = {}
+        self._counts_in_city_group: dict[CityGroup, CountsPeople_t] = {}
+        self._city_groups_of_city: dict[City, list[CityGroup]] = {}
+        self._shared_cities: list[City] = []
+        self._lockdown_applied: set[CityGroup] = set()
+        self._counts: CountsPeople_t = _zero_counts()
+        self._movement_tables: dict[tuple, np.ndarray] = {}
+        self._person_ids: t.Optional[dict[Person, int]] = None
+
+        self._step = 0
+        self._timers: dict[int, list[Person]] = {}
+        self._index_people()
 
     @property
     def people(self) -> tuple[Person]:
@@ -33,67 +78,488 @@ class World:
     def city_groups(self) -> tuple[CityGroup]:
         return tuple(self._city_groups)
 
-    def update(self) -> None:
-        for person in self._people:
-            person.update_position()
+    @property
+    def step(self) -> int:
+        return self._step
 
-        for city in self.cities:
-            counts = self._count_people_in_city(city)
-            for person in self._get_people_in_city(city):
-                person.eval_next_state(counts.copy())
+    @property
+    def rng(self) -> RandomStreams:
+        return self._rng
 
-        for person in self._people:
+    @property
+    def is_absorbing(self) -> bool:
+        # NOTE
+        #   Without anyone in E or I, nobody can change the state anymore.
+        return (
+            self._counts[PersonState.E] == 0
+            and self._counts[PersonState.I] == 0
+        )
+
+    def count_people(self) -> CountsPeople_t:
+        return self._counts.copy()
+
+    def count_people_in_city_groups(self) -> np.ndarray:
+        # NOTE
+        #   The numbers of people by city group and state code, like those
+        #   of the worlds on arrays.
+        counts = [
+            self._counts_in_city_group[city_group]
+            for city_group in self._city_groups
+        ]
+        return np.array(
+            [[c[state] for state in STATES] for c in counts],
+            dtype=np.int64,
+        ).reshape(len(counts), NUM_STATES)
+
+    def reevaluate_lockdown(self) -> None:
+        # NOTE
+        #   Evaluates the lockdown of the city groups again without a step,
+        #   e.g. after their lockdown regulations are changed.
+        self._lockdown()
+
+    def update(self) -> None:
+        self._step += 1
+        self._update_positions()
+
+        for person in self._eval_next_states():
             person.update_state()
+            self._schedule(person)
 
         self._lockdown()
 
-    def _get_people_in_same_city(self, person: Person) -> list[Person]:
-        result = []
-        for someone in self._people:
-            if someone == person:
+    def update_movement(self) -> None:
+        if not self.is_absorbing:
+            raise ValueError(
+                "The movement-only update is only valid in absorbing states."
+            )
+
+        self._step += 1
+        self._update_positions()
+        self._lockdown()
+
+    def _update_positions(self) -> None:
+        moves: list[tuple[Person, City]] = []
+
+        for city in self._cities:
+            num_others = city.num_visitables
+            if num_others == 0:
                 continue
-            if someone.position == person.position:
-                result.append(someone)
-        return result
+
+            # NOTE
+            #   People sharing the same model, infection and mobility have
+            #   the same movement weights, so destinations are drawn for the
+            #   whole class at once.
+            classes: dict[tuple, list[Person]] = {}
+            for person in self._people_in_city[city]:
+                key = (
+                    type(person),
+                    person.state is PersonState.I,
+                    person.p_staying,
+                    person.action_regulation,
+                )
+                classes.setdefault(key, []).append(person)
+
+            rng = self._rng.generator(self._step, STREAM_MOVEMENT, city._index)
+            visitables = city.current_visitables
+            for key, people in classes.items():
+                cum_weights = self._movement_table(key, people[0], num_others)
+                choices = np.searchsorted(
+                    cum_weights,
+                    rng.random(len(people)) * cum_weights[-1],
+                    side="right",
+                )
+                for person, choice in zip(people, choices.tolist()):
+                    if choice != 0:
+                        moves.append((person, visitables[choice - 1]))
+
+        for person, city in moves:
+            person._move(city)
+
+    def _movement_table(
+        self,
+        key: tuple,
+        person: Person,
+        num_others: int,
+    ) -> np.ndarray:
+        # NOTE
+        #   Same as `random.choices` with the cumulative weights of staying
+        #   and moving to each visitable city. They only depend on the class
+        #   and the number of visitables, so they are built once for each.
+        table_key = (key, num_others)
+        cum_weights = self._movement_tables.get(table_key)
+        if cum_weights is None:
+            p_staying, weight_others = person.movement_weights(num_others)
+            cum_weights = p_staying + weight_others * np.arange(
+                num_others + 1,
+            )
+            self._movement_tables[table_key] = cum_weights
+        return cum_weights
+
+    def _eval_next_states(self) -> list[Person]:
+        evaluated: list[Person] = []
+
+        # NOTE
+        #   Only susceptible people in cities with infected people may be
+        #   infected, and the others only change by their timers, so people
+        #   in quiet cities and in R are never visited.
+        for city in self._infectious_cities:
+            num_infected = self._counts_in_city[city][PersonState.I]
+
+            classes: dict[tuple, list[Person]] = {}
+            for person in self._susceptible_in_city[city]:
+                key = (type(person), person.p_infection)
+                classes.setdefault(key, []).append(person)
+
+            if not classes:
+                continue
+
+            rng = self._rng.generator(
+                self._step,
+                STREAM_INFECTION,
+                city._index,
+            )
+            for people in classes.values():
+                p_infection = people[0].infection_probability(num_infected)
+                for i in _sample_bernoulli(len(people), p_infection, rng):
+                    people[i]._infect()
+                    evaluated.append(people[i])
+
+        for person in self._timers.pop(self._step, ()):
+            # Skipping outdated schedules.
+            if person._due_step != self._step:
+                continue
+
+            if person.state is PersonState.E:
+                person._onset()
+            elif person.state is PersonState.I:
+                person._recover()
+            else:
+                continue
+            evaluated.append(person)
+
+        return evaluated
+
+    def _schedule(self, person: Person) -> None:
+        # NOTE
+        #   The remaining steps of `person` must be the ones at the current
+        #   step. Like the countdown of `Person.eval_next_state`, the
+        #   transition happens at the next step at the earliest.
+        if person.state is PersonState.E:
+            remaining_steps = person._remaining_steps_for_onset
+        elif person.state is PersonState.I:
+            remaining_steps = person._remaining_steps_for_recover
+        else:
+            return
+        if remaining_steps is None:
+            return
+
+        due_step = self._step + max(remaining_steps, 1)
+        person._due_step = due_step
+        self._timers.setdefault(due_step, []).append(person)
+
+    def _index_people(self) -> None:
+        self._people_in_city = {city: {} for city in self._cities}
+        self._susceptible_in_city = {city: {} for city in self._cities}
+        self._infectious_cities = {}
+        self._counts_in_city = {city: _zero_counts() for city in self._cities}
+        self._counts_in_city_group = {
+            city_group: _zero_counts() for city_group in self._city_groups
+        }
+        self._city_groups_of_city = {city: [] for city in self._cities}
+        self._counts = _zero_counts()
+        for city_group in self._city_groups:
+            for city in city_group.cities:
+                self._city_groups_of_city[city].append(city_group)
+        self._shared_cities = [
+            city for city, city_groups in self._city_groups_of_city.items()
+            if len(city_groups) > 1
+        ]
+
+        self._timers = {}
+        self._person_ids = None
+        for person in self._people:
+            remaining_steps_for_onset = person.remaining_steps_for_onset
+            remaining_steps_for_recover = person.remaining_steps_for_recover
+            person._remaining_steps_for_onset = remaining_steps_for_onset
+            person._remaining_steps_for_recover = remaining_steps_for_recover
+            person._due_step = None
+            person._world = self
+
+            self._people_in_city[person.position][person] = None
+            if person.state is PersonState.S:
+                self._susceptible_in_city[person.position][person] = None
+            self._add_counts(person.position, person.state, 1)
+            self._counts[person.state] += 1
+            self._schedule(person)
+
+    def _apply_people_arrays(
+        self,
+        states: np.ndarray,
+        positions: np.ndarray,
+        remaining_steps_for_onset: np.ndarray,
+        remaining_steps_for_recover: np.ndarray,
+        changed: t.Optional[np.ndarray] = None,
+    ) -> None:
+        # NOTE
+        #   Sets the people to the arrays of their state codes, the indices
+        #   of their cities and their remaining steps, and updates the
+        #   indices in bulk to the same as `_index_people` would build.
+        #   `changed` may tell the only people whose rows differ from them
+        #   otherwise, so that the others except in E and I, whose timers
+        #   are set again, are not visited.
+        cities = self._cities
+        num_cities = len(cities)
+        index = {city: i for i, city in enumerate(cities)}
+        people = np.empty(len(self._people), dtype=object)
+        people[:] = self._people
+
+        # Timers of the people in E and I like `_schedule`.
+        remaining_steps = np.where(
+            states == CODE_E,
+            remaining_steps_for_onset,
+            np.where(
+                states == CODE_I,
+                remaining_steps_for_recover,
+                NO_REMAINING_STEPS,
+            ),
+        )
+        scheduled = remaining_steps != NO_REMAINING_STEPS
+        due_steps = self._step + np.maximum(remaining_steps, 1)
+
+        def nullable(val: int) -> t.Optional[int]:
+            return None if val == NO_REMAINING_STEPS else val
+
+        # NOTE
+        #   The cities whose people change, all of them if every person is
+        #   applied, since their order may differ from `_index_people`.
+        if changed is None:
+            touched = set(range(num_cities))
+            updated = np.arange(len(people))
+        else:
+            touched = set()
+            updated = np.flatnonzero(changed | scheduled)
+        for person, state, position, onset, recover, due_step in zip(
+            people[updated].tolist(),
+            states[updated].tolist(),
+            positions[updated].tolist(),
+            remaining_steps_for_onset[updated].tolist(),
+            remaining_steps_for_recover[updated].tolist(),
+            np.where(scheduled, due_steps, NO_REMAINING_STEPS)[
+                updated
+            ].tolist(),
+        ):
+            state = STATES[state]
+            city = cities[position]
+            if person._state is not state or person._position is not city:
+                touched.add(index[person._position])
+                touched.add(position)
+
+            person._state = state
+            person._position = city
+            person._next_state = None
+            person._due_step = nullable(due_step)
+            person._remaining_steps_for_onset = nullable(onset)
+            person._remaining_steps_for_recover = nullable(recover)
+
+        scheduled = np.flatnonzero(scheduled)
+        order = scheduled[np.argsort(due_steps[scheduled], kind="stable")]
+        due_steps, begins = np.unique(due_steps[order], return_index=True)
+        self._timers = {
+            due_step: people[group].tolist()
+            for due_step, group in zip(
+                due_steps.tolist(),
+                np.split(order, begins[1:]),
+            )
+        }
+
+        # NOTE
+        #   The people in a city are kept in the order of the people, which
+        #   the draws of the steps depend on.
+        if touched:
+            order = np.argsort(positions, kind="stable")
+            bounds = np.searchsorted(
+                positions[order],
+                np.arange(num_cities + 1),
+            )
+            susceptible = states == CODE_S
+            for i in sorted(touched):
+                members = order[bounds[i]:bounds[i + 1]]
+                city = cities[i]
+                self._people_in_city[city] = dict.fromkeys(
+                    people[members].tolist(),
+                )
+                self._susceptible_in_city[city] = dict.fromkeys(
+                    people[members[susceptible[members]]].tolist(),
+                )
+
+        counts = np.bincount(
+            positions * NUM_STATES + states,
+            minlength=num_cities * NUM_STATES,
+        ).reshape(num_cities, NUM_STATES)
+        for i in sorted(touched):
+            self._counts_in_city[cities[i]].update(
+                zip(STATES, counts[i].tolist()),
+            )
+        for counts_in_city_group in self._counts_in_city_group.values():
+            counts_in_city_group.update(dict.fromkeys(STATES, 0))
+        for i, city in enumerate(cities):
+            for city_group in self._city_groups_of_city[city]:
+                counts_in_city_group = self._counts_in_city_group[city_group]
+                for state, count in zip(STATES, counts[i].tolist()):
+                    counts_in_city_group[state] += count
+        self._counts.update(zip(STATES, counts.sum(axis=0).tolist()))
+
+        # NOTE
+        #   The cities with infected people in the order of their first
+        #   infected person, as `_index_people` finds them.
+        infected = np.flatnonzero(states == CODE_I)
+        first = np.full(num_cities, len(people))
+        np.minimum.at(first, positions[infected], infected)
+        infectious = np.flatnonzero(first < len(people))
+        self._infectious_cities = dict.fromkeys(
+            cities[i] for i in infectious[np.argsort(first[infectious])]
+        )
+
+    def _uniform(self, person: Person, purpose: int) -> float:
+        # NOTE
+        #   The uniform of `person` for `purpose` at the current step, for
+        #   the draws of `Person` itself. The ids of people are only built
+        #   on the first draw since the steps of the world do not use them.
+        if self._person_ids is None:
+            self._person_ids = {
+                someone: i for i, someone in enumerate(self._people)
+            }
+        ids = np.array([self._person_ids[person]])
+        return float(self._rng.uniform(self._step, purpose, ids)[0])
+
+    def _add_counts(self, city: City, state: PersonState, delta: int) -> None:
+        counts = self._counts_in_city[city]
+        counts[state] += delta
+        if state is PersonState.I:
+            if counts[state] > 0:
+                self._infectious_cities[city] = None
+            else:
+                self._infectious_cities.pop(city, None)
+        for city_group in self._city_groups_of_city[city]:
+            self._counts_in_city_group[city_group][state] += delta
+
+    def _move_person(
+        self,
+        person: Person,
+        city_from: City,
+        city_to: City,
+    ) -> None:
+        del self._people_in_city[city_from][person]
+        self._people_in_city[city_to][person] = None
+        if person.state is PersonState.S:
+            del self._susceptible_in_city[city_from][person]
+            self._susceptible_in_city[city_to][person] = None
+        self._add_counts(city_from, person.state, -1)
+        self._add_counts(city_to, person.state, 1)
+
+    def _change_person_state(
+        self,
+        person: Person,
+        state_from: PersonState,
+        state_to: PersonState,
+    ) -> None:
+        if state_from is PersonState.S:
+            del self._susceptible_in_city[person.position][person]
+        self._add_counts(person.position, state_from, -1)
+        self._add_counts(person.position, state_to, 1)
+        self._counts[state_from] -= 1
+        self._counts[state_to] += 1
+
+    def _get_people_in_same_city(self, person: Person) -> list[Person]:
+        return [
+            someone for someone in self._people_in_city[person.position]
+            if someone is not person
+        ]
 
     def _lockdown(self) -> None:
+        evaluated: set[CityGroup] = set()
+        changed: dict[City, None] = {}
         for city_group in self._city_groups:
-            counts = self._count_people_in_city_group(city_group)
+            counts = self._counts_in_city_group[city_group]
             num_people = sum(counts.values())
             if num_people == 0:
                 continue
 
+            evaluated.add(city_group)
             rate_infected = counts[PersonState.I] / num_people
-            if rate_infected >= city_group.lockdown_regulation:
-                city_group.lock(self._cities)
+            in_lockdown = rate_infected >= city_group.lockdown_regulation
+
+            # Applying only changes after the first evaluation.
+            if (
+                city_group in self._lockdown_applied
+                and in_lockdown == city_group.in_lockdown
+            ):
+                continue
+
+            self._lockdown_applied.add(city_group)
+            if in_lockdown:
+                city_group.lock()
             else:
-                city_group.unlock(self._cities)
+                city_group.unlock()
+            changed.update(dict.fromkeys(city_group.cities))
+
+        # NOTE
+        #   Every evaluated group used to be locked or unlocked in order each
+        #   step, so a city follows the last evaluated group among its
+        #   groups. The cities of the changed groups are resolved again
+        #   against all their groups, and so are the cities in several
+        #   groups every step, since which of their groups is evaluated may
+        #   change without any group changing.
+        for city in itertools.chain(changed, self._shared_cities):
+            for city_group in reversed(self._city_groups_of_city[city]):
+                if city_group in evaluated:
+                    if city_group.in_lockdown and not city.in_lockdown:
+                        city.lock()
+                    elif not city_group.in_lockdown and city.in_lockdown:
+                        city.unlock()
+                    break
 
     def _get_people_in_city(self, city: City) -> list[Person]:
-        return [person for person in self._people if person.position == city]
+        return list(self._people_in_city[city])
 
     def _count_people_in_city(self, city: City) -> CountsPeople_t:
-        result = {
-            PersonState.S: 0,
-            PersonState.E: 0,
-            PersonState.I: 0,
-            PersonState.R: 0,
-        }
-        for person in self._get_people_in_city(city):
-            result[person.state] += 1
-        return result
+        return self._counts_in_city[city].copy()
 
     def _count_people_in_city_group(
         self,
         city_group: CityGroup,
     ) -> CountsPeople_t:
-        result = {
-            PersonState.S: 0,
-            PersonState.E: 0,
-            PersonState.I: 0,
-            PersonState.R: 0,
-        }
-        for city in city_group.cities:
-            for person in self._get_people_in_city(city):
-                result[person.state] += 1
-        return result
+        return self._counts_in_city_group[city_group].copy()
+
+
+def _zero_counts() -> CountsPeople_t:
+    return {
+        PersonState.S: 0,
+        PersonState.E: 0,
+        PersonState.I: 0,
+        PersonState.R: 0,
+    }
+
+
+def _sample_bernoulli(
+    n: int,
+    p: float,
+    rng: np.random.Generator,
+) -> t.Iterator[int]:
+    # NOTE
+    #   Yields the indices of successes among `n` Bernoulli trials with
+    #   probability `p`, jumping over failures with geometric draws so that
+    #   the cost is proportional to the number of successes.
+    if p <= 0:
+        return
+    if p >= 1:
+        yield from range(n)
+        return
+
+    log_q = math.log1p(-p)
+    i = -1
+    while True:
+        i += int(math.log(1. - rng.random()) / log_q) + 1
+        if i >= n:
+            return
+        yield i
@@ -0,0 +1,27 @@
+import pydantic
+import pytest
+
+from seir_markov_lockdown.app import SweepConfig
+
+
+INPUTS = {
+    "file_cities": "cities.csv",
+    "file_connections": "connections.csv",
+    "file_city_groups": "city_groups.csv",
+    "file_people": "people.csv",
+    "steps": 10,
+    "dir_snapshots": "snapshots",
+}
+
+
+@pytest.mark.parametrize(
+    "param",
+    ("p_infection", "action_regulation", "lockdown_regulation"),
+)
+def test_sweep_values_are_probabilities(param: str) -> None:
+    config = SweepConfig(**INPUTS, **{param: [0., 0.5, 1.]})
+    assert getattr(config, param) == [0., 0.5, 1.]
+
+    for val in (-0.1, 1.5):
+        with pytest.raises(pydantic.ValidationError):
+            SweepConfig(**INPUTS, **{param: [0.5, val]})
@@ -0,0 +1,55 @@
+from seir_markov_lockdown import (
+    City,
+    CityGraph,
+    Person,
+    PersonState,
+    World,
+)
+
+
+def make_cities() -> list[City]:
+    cities = [City("a"), City("b")]
+    cities[0].setup_initial_visitables(cities[1])
+    cities[1].setup_initial_visitables(cities[0])
+    CityGraph(cities)
+    return cities
+
+
+def make_world(seed: int) -> World:
+    cities = make_cities()
+    people = [
+        Person(cities[i % 2], PersonState.S, 0.5, 0.5, 0.5, 2, 3)
+        for i in range(20)
+    ]
+    return World(people, cities, [], seed=seed)
+
+
+def draws(world: World) -> list[tuple[str, PersonState]]:
+    result = []
+    for person in world.people:
+        person.update_position()
+        person.eval_next_state({PersonState.I: 1})
+        result.append((person.position.name, person._next_state))
+    return result
+
+
+def test_draws_without_world() -> None:
+    cities = make_cities()
+    person = Person(cities[0], PersonState.S, 0.5, 0.5, 0.5, 2, 3)
+
+    person.update_position()
+    person.eval_next_state({PersonState.I: 1})
+    assert person.position in cities
+    assert person._next_state in (PersonState.S, PersonState.E)
+
+
+def test_draws_from_world_streams() -> None:
+    assert draws(make_world(1)) == draws(make_world(1))
+
+
+def test_given_uniforms() -> None:
+    person = make_world(1).people[0]
+    person.eval_next_state({PersonState.I: 1}, u=0.)
+    assert person._next_state is PersonState.E
+    person.eval_next_state({PersonState.I: 1}, u=0.99)
+    assert person._next_state is PersonState.S
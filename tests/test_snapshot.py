@@ -0,0 +1,191 @@
+from pathlib import Path
+import typing as t
+
+import pytest
+
+from seir_markov_lockdown import World
+from seir_markov_lockdown.app import (
+    FILE_TRAJECTORY,
+    SUFFIXES_SNAPSHOT,
+    SnapshotConfig,
+    SnapshotReader,
+    TrajectoryReader,
+    load_world_from_snapshot,
+    run_with_snapshots,
+)
+
+
+STEPS = 5
+ENGINES = ("object", "array", "sharded", "ensemble", "compartment")
+FORMATS = ("csv", "columnar", "trajectory")
+
+
+@pytest.fixture
+def inputs(tmp_path: Path) -> dict[str, str]:
+    # NOTE
+    #   Three cities on a line, the middle one shared by two groups, and a
+    #   few people infected from the start.
+    files = {
+        "file_cities": ("name,x,y", "a,0,0", "b,1,0", "c,2,0"),
+        "file_connections": ("from,to", "a,b", "b,c"),
+        "file_city_groups": (
+            "name,city,lockdown_regulation",
+            "west,a,0.2",
+            "west,b,0.2",
+            "east,b,0.3",
+            "east,c,0.3",
+        ),
+        "file_people": (
+            "city_name,init_state,p_infection,p_staying,action_regulation,"
+            "steps_for_onset,steps_for_recover",
+            *(
+                f"{city},{state},0.3,0.5,0.5,2,3"
+                for city, state in (
+                    ("a", "I"), ("a", "S"), ("a", "S"), ("a", "E"),
+                    ("b", "S"), ("b", "S"), ("b", "I"), ("b", "R"),
+                    ("c", "S"), ("c", "S"), ("c", "S"), ("c", "S"),
+                )
+            ),
+        ),
+    }
+    paths = {}
+    for field, lines in files.items():
+        path = tmp_path / f"{field}.csv"
+        path.write_text("\n".join(lines) + "\n")
+        paths[field] = str(path)
+    return paths
+
+
+def run(
+    inputs: dict[str, str],
+    dir_snapshots: Path,
+    **settings: t.Any,
+) -> None:
+    config = SnapshotConfig(
+        **inputs,
+        steps=STEPS,
+        seed=1,
+        num_shards=2,
+        num_replicates=2,
+        dir_snapshots=str(dir_snapshots),
+        **settings,
+    )
+    run_with_snapshots(config)
+
+
+def written_steps(dir_snapshots: Path, snapshot_format: str) -> list[int]:
+    if snapshot_format == "trajectory":
+        with TrajectoryReader(dir_snapshots / FILE_TRAJECTORY) as reader:
+            return list(reader.steps)
+    files = dir_snapshots.glob(f"*{SUFFIXES_SNAPSHOT[snapshot_format]}")
+    return sorted(int(file.name.split(".")[0]) for file in files)
+
+
+@pytest.mark.parametrize("queue_size", (0, 2))
+@pytest.mark.parametrize("snapshot_format", FORMATS)
+@pytest.mark.parametrize("engine", ENGINES)
+def test_run_with_snapshots(
+    inputs: dict[str, str],
+    tmp_path: Path,
+    engine: str,
+    snapshot_format: str,
+    queue_size: int,
+) -> None:
+    dir_snapshots = tmp_path / "snapshots"
+    run(
+        inputs,
+        dir_snapshots,
+        engine=engine,
+        snapshot_format=snapshot_format,
+        snapshot_queue_size=queue_size,
+    )
+
+    dirs = [dir_snapshots]
+    if engine == "ensemble":
+        dirs = [dir_snapshots / "0", dir_snapshots / "1"]
+    for dir_replicate in dirs:
+        steps = written_steps(dir_replicate, snapshot_format)
+        assert steps == list(range(STEPS + 1))
+
+
+@pytest.mark.parametrize("snapshot_format", FORMATS)
+def test_sharded_same_as_array(
+    inputs: dict[str, str],
+    tmp_path: Path,
+    snapshot_format: str,
+) -> None:
+    outputs = {}
+    for engine in ("array", "sharded"):
+        dir_snapshots = tmp_path / engine
+        run(
+            inputs,
+            dir_snapshots,
+            engine=engine,
+            snapshot_format=snapshot_format,
+        )
+        outputs[engine] = {
+            file.name: file.read_bytes() for file in dir_snapshots.iterdir()
+        }
+    assert outputs["sharded"] == outputs["array"]
+
+
+def indices(world: World) -> tuple:
+    # NOTE
+    #   The indices of `world` by the positions of people and the names of
+    #   cities and groups, in the orders the draws depend on.
+    ids = {person: i for i, person in enumerate(world.people)}
+
+    def by_city(people_in_city: dict) -> dict:
+        return {
+            city.name: [ids[person] for person in people]
+            for city, people in people_in_city.items()
+        }
+
+    return (
+        by_city(world._people_in_city),
+        by_city(world._susceptible_in_city),
+        [city.name for city in world._infectious_cities],
+        {city.name: c for city, c in world._counts_in_city.items()},
+        {g.name: c for g, c in world._counts_in_city_group.items()},
+        world.count_people(),
+        {
+            step: [ids[person] for person in people]
+            for step, people in world._timers.items()
+        },
+        [
+            (
+                person.state,
+                person.position.name,
+                person.remaining_steps_for_onset,
+                person.remaining_steps_for_recover,
+            )
+            for person in world.people
+        ],
+        [city.in_lockdown for city in world.cities],
+        [city_group.in_lockdown for city_group in world.city_groups],
+    )
+
+
+def test_reader_same_as_fresh_load(
+    inputs: dict[str, str],
+    tmp_path: Path,
+) -> None:
+    dir_snapshots = tmp_path / "snapshots"
+    run(inputs, dir_snapshots, snapshot_format="columnar")
+    files = sorted(dir_snapshots.glob("*.snap"))
+    order = [*files, *reversed(files), files[2], files[2], files[0]]
+
+    args = (
+        inputs["file_cities"],
+        inputs["file_connections"],
+        inputs["file_city_groups"],
+        inputs["file_people"],
+    )
+    with SnapshotReader(*args, cache_size=2) as reader:
+        for file in order:
+            world = reader.load(file)
+            fresh, _ = load_world_from_snapshot(file, *args)
+            for person in fresh.people:
+                person._due_step = None
+            fresh._index_people()
+            assert indices(world) == indices(fresh)
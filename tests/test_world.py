@@ -0,0 +1,51 @@
+import numpy as np
+
+from seir_markov_lockdown import (
+    ArrayWorld,
+    City,
+    CityGraph,
+    CityGroup,
+    Person,
+    PersonState,
+    World,
+    set_lockdown_regulation,
+)
+
+
+def make_world() -> World:
+    cities = [City(name) for name in "abc"]
+    cities[0].setup_initial_visitables(cities[1])
+    cities[1].setup_initial_visitables(cities[0], cities[2])
+    cities[2].setup_initial_visitables(cities[1])
+    CityGraph(cities)
+    city_groups = [
+        CityGroup("west", cities[:2], 0.5),
+        CityGroup("east", cities[1:], 0.5),
+    ]
+    states = (PersonState.S, PersonState.I, PersonState.E, PersonState.R)
+    people = [
+        Person(cities[i % 3], states[i % 4], 0.3, 0.5, 0.5, 2, 3)
+        for i in range(12)
+    ]
+    return World(people, cities, city_groups, seed=1)
+
+
+def test_count_people_in_city_groups() -> None:
+    world = make_world()
+    counts = world.count_people_in_city_groups()
+    array_counts = ArrayWorld.from_world(world).count_people_in_city_groups()
+    assert counts.shape == (2, len(PersonState))
+    np.testing.assert_array_equal(counts, array_counts)
+
+
+def test_reevaluate_lockdown() -> None:
+    world = make_world()
+    array_world = ArrayWorld.from_world(world)
+    for w in (world, array_world):
+        set_lockdown_regulation(w, 0.)
+        w.reevaluate_lockdown()
+
+    assert all(city_group.in_lockdown for city_group in world.city_groups)
+    assert array_world.group_in_lockdown.all()
+    assert all(city.in_lockdown for city in world.cities)
+    assert array_world.in_lockdown.all()